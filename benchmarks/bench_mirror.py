@@ -0,0 +1,69 @@
+"""
+ミラーモードの読み取り性能を共有DBへの直接読み取りと比較するベンチマーク
+
+使い方:
+    python benchmarks/bench_mirror.py <DBファイルのパス> [読み込み回数]
+
+DBのパスに共有フォルダ上のファイル（例: //192.168.1.200/共有/.../cleaning_instructions.db）を
+指定すると、実運用に近い条件で比較できる。指定したDBは読み取りのみ行う。
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from database import DatabaseHandler
+
+def pick_dates(handler, limit=30):
+    rows = handler.conn.execute(
+        "SELECT DISTINCT acquisition_date FROM production_plan ORDER BY acquisition_date DESC LIMIT ?", (limit,)
+    ).fetchall()
+    return [row[0] for row in rows]
+
+def measure(label, handler, dates, repeat):
+    start = time.perf_counter()
+    row_count = 0
+    for _ in range(repeat):
+        for acquisition_date in dates:
+            data, error = handler.get_data_by_date(acquisition_date)
+            if error:
+                raise RuntimeError(error)
+            row_count += len(data)
+    elapsed = time.perf_counter() - start
+    loads = repeat * len(dates)
+    print(f"{label:<12} {loads:>5} loads  {row_count:>8} rows  {elapsed:8.3f} s  {elapsed / loads * 1000:8.2f} ms/load")
+    return elapsed
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return 1
+    db_path = sys.argv[1]
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    direct = DatabaseHandler(db_path)
+    if not direct.connect():
+        return 1
+    dates = pick_dates(direct)
+    if not dates:
+        print("production_plan にデータがありません。")
+        return 1
+
+    direct_time = measure("direct", direct, dates, repeat)
+    direct.close()
+
+    start = time.perf_counter()
+    mirrored = DatabaseHandler(db_path, mirror=":memory:")
+    if not mirrored.connect() or not mirrored.mirror_conn:
+        return 1
+    copy_time = time.perf_counter() - start
+    print(f"{'mirror copy':<12} {copy_time:8.3f} s (backup API)")
+    mirror_time = measure("mirror", mirrored, dates, repeat)
+    mirrored.close()
+
+    print(f"speedup      {direct_time / mirror_time:8.1f}x (copy included: {direct_time / (mirror_time + copy_time):.1f}x)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+行データの保持形式（行ごとの dict と PlanRow）のメモリ消費とアクセス速度を比較するベンチマーク
+
+使い方:
+    python benchmarks/bench_row_store.py [DBファイルのパス] [日数]
+
+DBを指定しない場合は、1日1,000行の生産計画を指定日数分（既定: 31日＝1か月分）持つ
+メモリ上のDBを作成して比較する。指定したDBは読み取りのみ行う。
+"""
+import os
+import sqlite3
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from row_store import rows_from_cursor, header_values
+
+HEADERS = [
+    "set_date", "machine_no", "customer_name", "part_number",
+    "product_name", "next_process", "quantity", "completion_date", "material_id", "cleaning_instruction", "notes"
+]
+
+def create_sample_db(days, rows_per_day=1000):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""
+        CREATE TABLE production_plan (
+            id INTEGER PRIMARY KEY, acquisition_date TEXT, machine_no TEXT,
+            manufacturing_check INTEGER, cleaning_check INTEGER, previous_day_set INTEGER,
+            part_number TEXT, product_name TEXT, customer_name TEXT, next_process TEXT, quantity INTEGER,
+            set_date TEXT, completion_date TEXT, material_id TEXT, cleaning_instruction TEXT, notes TEXT,
+            updated_at TEXT
+        )
+    """)
+    rows = []
+    for day in range(days):
+        acquisition_date = f"2025-08-{day % 28 + 1:02d}" if days <= 28 else f"2025-{8 + day // 28:02d}-{day % 28 + 1:02d}"
+        for i in range(rows_per_day):
+            rows.append((
+                acquisition_date, f"{'ABCDEF'[i % 6]}-{i // 6 + 1}", i % 2, i % 3 == 0, 0,
+                f"PN-{i:05d}", f"製品{i}", f"客先{i % 20}", "洗浄", 100 + i,
+                acquisition_date, acquisition_date, str(i % 9), str(i % 5), "出荷無し" if i % 7 == 0 else "",
+                f"{acquisition_date} 08:00:00.000000",
+            ))
+    conn.executemany(
+        "INSERT INTO production_plan (acquisition_date, machine_no, manufacturing_check, cleaning_check, previous_day_set, "
+        "part_number, product_name, customer_name, next_process, quantity, set_date, completion_date, material_id, "
+        "cleaning_instruction, notes, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows
+    )
+    return conn
+
+def load_dicts(conn):
+    conn.row_factory = sqlite3.Row
+    return [dict(row) for row in conn.execute("SELECT * FROM production_plan").fetchall()]
+
+def load_plan_rows(conn):
+    conn.row_factory = sqlite3.Row
+    return rows_from_cursor(conn.execute("SELECT * FROM production_plan"))
+
+def measure_memory(label, loader, conn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = loader(conn)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} {len(rows):>8} rows  {current / 1024 / 1024:8.1f} MiB  {current / len(rows):7.0f} B/row  load {elapsed:6.3f} s")
+    return rows
+
+def measure_access(label, rows, repeat=3):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for row in rows:
+            header_values(row, HEADERS)
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<10} {elapsed * 1000:8.1f} ms/pass  {elapsed / len(rows) * 1e6:6.2f} us/row (表示カラムの取得)")
+
+def main():
+    if len(sys.argv) > 1 and not sys.argv[1].isdigit():
+        conn = sqlite3.connect(sys.argv[1])
+    else:
+        days = int(sys.argv[-1]) if len(sys.argv) > 1 else 31
+        conn = create_sample_db(days)
+
+    dict_rows = measure_memory("dict", load_dicts, conn)
+    plan_rows = measure_memory("PlanRow", load_plan_rows, conn)
+    measure_access("dict", dict_rows)
+    measure_access("PlanRow", plan_rows)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+import time
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+class ChangeTracker(QObject):
+    """
+    共有DBの変更を PRAGMA data_version で定期的に確認し、変更された行だけを通知する
+    updated_at 列がある場合は画面の行の updated_at と突き合わせ、異なる行だけを取得する
+    （updated_at は各端末の時計で書き込まれるため、時刻の大小（前回の最大値以降かどうか）では判定しない）
+
+    多数の端末が終日開いたままでも共有フォルダへの負荷が一定以内に収まるよう、確認の間隔を調整する
+    - 変更が無い確認が続くと間隔を max_interval_ms まで広げ、変更を検知したら interval_ms に戻す
+    - ウィンドウが背面にある間は background_interval_ms より短くしない
+    - 1回の確認にかかった時間の平均が、間隔の budget（割合）を超えないよう間隔を広げる
+    """
+    rows_changed = Signal(str, object, bool)  # 取得日, 変更された行のリスト, 差分のみかどうか
+    token_updated = Signal(str, object)  # 取得日, 画面のデータが最新であることを確認した変更トークン
+
+    def __init__(self, db_worker, interval_ms=3000, is_busy=None, max_interval_ms=15000,
+                 background_interval_ms=30000, budget=0.02, backoff=1.5, parent=None):
+        super().__init__(parent)
+        self.db_worker = db_worker
+        self._is_busy = is_busy  # Trueを返す間はポーリングを見送る（未反映の編集がある場合など）
+        self.interval_ms = interval_ms
+        self.max_interval_ms = max(max_interval_ms, interval_ms)
+        self.background_interval_ms = background_interval_ms
+        self.budget = budget
+        self.backoff = backoff
+        self._idle_polls = 0  # 変更が無かった確認の連続回数
+        self._foreground = True
+        self._average_cost_ms = 0.0  # 1回の確認にかかった時間（指数移動平均）
+        self.poll_count = 0
+        self.change_count = 0  # 変更を検知した確認の回数
+        self.fetched_rows = 0  # 変更の確認で取得した行数
+        self._date = None
+        self._token = None
+        self._rows = None  # 画面に表示している行（モデルと同じ行データを共有している）
+        self._polling = False
+        self._local_edit_generation = 0
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.poll)
+
+    def reset(self, acquisition_date, token, rows):
+        """全件読み込みの直後に呼び出し、以降の差分検知の基準を設定する"""
+        self._date = acquisition_date
+        self._token = token
+        self._rows = rows or []
+        self._idle_polls = 0
+        self._update_interval()
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+
+    def set_foreground(self, foreground):
+        """ウィンドウが前面かどうかを設定する（前面に戻った場合はすぐに確認する）"""
+        if foreground == self._foreground:
+            return
+        self._foreground = foreground
+        if foreground:
+            self._idle_polls = 0
+            self.poll()
+        self._update_interval()
+
+    def stats(self):
+        """確認の回数・変更を検知した回数・取得した行数・現在の間隔・1回の確認にかかる時間"""
+        return {
+            "polls": self.poll_count,
+            "changes": self.change_count,
+            "rows": self.fetched_rows,
+            "interval_ms": self._timer.interval(),
+            "cost_ms": round(self._average_cost_ms, 1),
+        }
+
+    def _update_interval(self):
+        interval = min(self.interval_ms * self.backoff ** self._idle_polls, self.max_interval_ms)
+        if not self._foreground:
+            interval = max(interval, self.background_interval_ms)
+        if self.budget > 0:
+            interval = max(interval, self._average_cost_ms / self.budget)
+        interval = int(interval)
+        if interval != self._timer.interval():
+            self._timer.setInterval(interval)
+
+    def note_local_edit(self):
+        """自端末での編集を記録する（編集前に開始した確認結果で画面を上書きしないため）"""
+        self._local_edit_generation += 1
+
+    def poll(self):
+        """変更トークンを確認し、変化していれば変更された行を取得する"""
+        if self._date is None or self._polling:
+            return
+        if self._is_busy and self._is_busy():
+            return
+
+        acquisition_date, last_token = self._date, self._token
+        # 自端末の書き込みで更新された updated_at も含め、確認を始めた時点の値と突き合わせる
+        known_versions, known_values = {}, {}
+        for row in self._rows:
+            known_versions[row.get("id")] = row.get("updated_at")
+            if row.get("updated_at") is None:
+                # updated_at が未設定の行は値で比べる（確認中に画面で変更されても影響しないよう複製を渡す）
+                known_values[row.get("id")] = dict(row.items())
+        generation = self._local_edit_generation
+
+        def task(handler):
+            started = time.perf_counter()
+            token = handler.get_change_token()
+            if token is None or token == last_token:
+                return token, None, False, None, (time.perf_counter() - started) * 1000
+            rows, partial, error = handler.get_changed_rows(acquisition_date, known_versions, known_values)
+            return token, rows, partial, error, (time.perf_counter() - started) * 1000
+
+        self._polling = True
+        self.db_worker.submit(
+            'poll', task,
+            callback=lambda result, error: self._on_polled(acquisition_date, generation, result, error)
+        )
+
+    def _on_polled(self, acquisition_date, generation, result, error):
+        self._polling = False
+        if error or result is None:
+            return
+        token, rows, partial, error, cost_ms = result
+        self.poll_count += 1
+        self._average_cost_ms = cost_ms if self.poll_count == 1 else self._average_cost_ms * 0.8 + cost_ms * 0.2
+        # 他端末のコミットがあれば（行を取得した場合）間隔を戻し、無ければ少しずつ広げる
+        if rows is not None:
+            self._idle_polls = 0
+            self.fetched_rows += len(rows)
+            self.change_count += 1
+        else:
+            self._idle_polls += 1
+        self._update_interval()
+        # 確認中に日付が変わった・自端末で編集した場合は破棄し、次回の確認でやり直す
+        if acquisition_date != self._date or generation != self._local_edit_generation:
+            return
+        if error:
+            print(error)
+            return
+
+        token_changed = token != self._token
+        self._token = token
+        if rows is not None:
+            if rows or not partial:
+                self.rows_changed.emit(acquisition_date, rows, partial)
+        if token_changed:
+            self.token_updated.emit(acquisition_date, token)
@@ -1,17 +1,48 @@
 import sqlite3
 import os
+import datetime
+
+from schema import SchemaManager
+from row_store import rows_from_cursor
+
+# UPDATE ... RETURNING は SQLite 3.35.0 以降で利用可能
+SUPPORTS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# ミラーの差分コピーで、端末間の時計のずれを見込んで前回より前から取り直す時間
+MIRROR_CLOCK_MARGIN = datetime.timedelta(minutes=10)
+
+def now_timestamp():
+    """updated_at 列に書き込む現在時刻（文字列比較で順序が保たれる形式）"""
+    return datetime.datetime.now().isoformat(sep=' ', timespec='microseconds')
 
 class DatabaseHandler:
-    def __init__(self, db_path):
+    def __init__(self, db_path, mirror=None):
+        """
+        :param db_path: 共有DBのパス
+        :param mirror: ミラーモードの複製先（":memory:" またはローカルのファイルパス）。Noneの場合は共有DBを直接読む
+        """
         self.db_path = db_path
         self.conn = None
+        self._previous_value = None
+        self._columns = None
+        self.mirror = mirror
+        self.mirror_conn = None
+        self._mirror_token = None
+        self._mirror_watermark = None
+        self._mirror_writes = []
 
     def connect(self):
         try:
             self.conn = sqlite3.connect(self.db_path, timeout=5)
             # Row factoryをここに設定すると、すべてのカーソルが辞書風の行を返すようになる
             self.conn.row_factory = sqlite3.Row
+            if SUPPORTS_RETURNING:
+                # 更新前の値をUPDATE文の中で受け取り、RETURNINGで返すための関数
+                self.conn.create_function("keep_previous", 2, self._keep_previous)
+                self.conn.create_function("previous_value", 0, lambda: self._previous_value)
             print("Database connection successful.")
+            if self.mirror:
+                self._open_mirror()
             return True
         except sqlite3.Error as e:
             print(f"Error connecting to database: {e}")
@@ -19,11 +50,249 @@ class DatabaseHandler:
             return False
 
     def close(self):
+        if self.mirror_conn:
+            self.mirror_conn.close()
+            self.mirror_conn = None
         if self.conn:
             self.conn.close()
             self.conn = None
+            self._columns = None
             print("Database connection closed.")
 
+    def interrupt(self):
+        """
+        実行中のクエリを中断する（別スレッドから呼び出し可能）
+        """
+        if self.conn:
+            self.conn.interrupt()
+        if self.mirror_conn:
+            self.mirror_conn.interrupt()
+
+    def _open_mirror(self):
+        """
+        共有DBをバックアップAPIで一括コピーし、読み取り用のミラーを作成する
+        ランダムなページ読み込みの代わりに1回の連続読み込みで済むため、共有フォルダ越しでも速い
+        失敗した場合はミラーを使わずに共有DBを直接読む
+        """
+        try:
+            token = self.get_change_token()
+            self.mirror_conn = sqlite3.connect(self.mirror)
+            self.mirror_conn.row_factory = sqlite3.Row
+            self.conn.backup(self.mirror_conn)
+            self._mirror_token = token
+            self._mirror_watermark = self._read_mirror_watermark()
+            print(f"Database mirrored to {self.mirror}.")
+            return True
+        except sqlite3.Error as e:
+            print(f"Failed to create database mirror: {e}")
+            if self.mirror_conn:
+                self.mirror_conn.close()
+            self.mirror_conn = None
+            return False
+
+    def _read_mirror_watermark(self):
+        if not self.has_column("updated_at"):
+            return None
+        return self.mirror_conn.execute("SELECT MAX(updated_at) FROM production_plan").fetchone()[0]
+
+    def _table_summary(self, conn):
+        """行数とidの最大値（差分のコピーで削除・取りこぼしが無いかの確認用）"""
+        return tuple(conn.execute("SELECT COUNT(*), MAX(id) FROM production_plan").fetchone())
+
+    def _rows_differing_from_mirror(self, rows):
+        """共有DBから取得した行のうち、ミラーの行と値が異なる（またはミラーに無い）行"""
+        mirrored = {}
+        ids = [row["id"] for row in rows]
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            for row in self.mirror_conn.execute(f"SELECT * FROM production_plan WHERE id IN ({placeholders})", chunk):
+                mirrored[row["id"]] = tuple(row)
+        return [row for row in rows if mirrored.get(row["id"]) != tuple(row)]
+
+    def sync_mirror(self):
+        """
+        他の接続によるコミットがあればミラーを最新化する
+        updated_at 列がある場合は変更された行のみ、無い場合はバックアップAPIで全体を再コピーする
+        差分のコピーでは反映できない変更（削除、時計が遅れている端末の更新）が残る場合も全体を再コピーする
+        """
+        if not self.mirror_conn:
+            return
+        token = self.get_change_token()
+        if token is None or token == self._mirror_token:
+            return
+        try:
+            copied = False
+            if self._mirror_watermark is not None:
+                # updated_at は各端末の時計で書き込まれるため、少し前からの行と時刻の無い行（取り込み処理の行）も取得する
+                since = self._mirror_watermark
+                try:
+                    since = (datetime.datetime.fromisoformat(since) - MIRROR_CLOCK_MARGIN).isoformat(sep=' ')
+                except (TypeError, ValueError):
+                    pass
+                cursor = self.conn.execute(
+                    "SELECT * FROM production_plan WHERE updated_at >= ? OR updated_at IS NULL", (since,)
+                )
+                rows = self._rows_differing_from_mirror(cursor.fetchall())
+                if rows:
+                    columns = rows[0].keys()
+                    placeholders = ", ".join("?" for _ in columns)
+                    self.mirror_conn.executemany(
+                        f"INSERT OR REPLACE INTO production_plan ({', '.join(columns)}) VALUES ({placeholders})",
+                        [tuple(row) for row in rows]
+                    )
+                    self.mirror_conn.commit()
+                # 変更された行が見つからない（時計が遅れている端末の更新など）場合や、
+                # 行数・idの最大値が一致しない（削除・取りこぼしがある）場合は全体を取り直す
+                copied = bool(rows) and self._table_summary(self.conn) == self._table_summary(self.mirror_conn)
+            if not copied:
+                self.conn.backup(self.mirror_conn)
+            self._mirror_token = token
+            self._mirror_watermark = self._read_mirror_watermark()
+        except sqlite3.Error as e:
+            print(f"Failed to refresh database mirror: {e}")
+
+    def _reader(self):
+        """読み取りに使う接続（ミラーモードでは最新化したローカルのミラー）"""
+        if self.mirror_conn:
+            self.sync_mirror()
+            return self.mirror_conn
+        return self.conn
+
+    def _queue_mirror_write(self, query, params):
+        """共有DBへのコミット後にミラーにも同じ更新を適用するため記録しておく"""
+        if self.mirror_conn:
+            self._mirror_writes.append((query, params))
+
+    def _apply_mirror_writes(self, committed=True):
+        writes, self._mirror_writes = self._mirror_writes, []
+        if not committed or not self.mirror_conn or not writes:
+            return
+        try:
+            for query, params in writes:
+                self.mirror_conn.execute(query, params)
+            self.mirror_conn.commit()
+        except sqlite3.Error as e:
+            print(f"Failed to apply writes to database mirror: {e}")
+            # 次回の読み取り時にバックアップAPIで全体を取り直す
+            self._mirror_token = None
+            self._mirror_watermark = None
+
+    def ping(self):
+        """
+        共有DBに実際にアクセスできるかを確認する（未接続の場合は接続を試みる）
+        :return: アクセスできた場合True
+        """
+        if not self.conn:
+            return self.connect()
+        try:
+            self.conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+            return True
+        except sqlite3.Error as e:
+            print(f"Database is not reachable: {e}")
+            return False
+
+    def ensure_schema(self):
+        """
+        スキーマの互換性を検査し、不足しているインデックスを作成する（ミラーにも同じインデックスを作成する）
+        :return: (互換性があるかどうか, 検査結果の辞書)
+        """
+        if not self.conn:
+            return False, {"error": "データベースに接続されていません。"}
+        compatible, report = SchemaManager(self.conn).ensure()
+        if compatible and self.mirror_conn:
+            SchemaManager(self.mirror_conn).ensure()
+        return compatible, report
+
+    def explain_queries(self):
+        """主なクエリの実行計画を取得する（ミラーモードでは共有DBの実行計画）"""
+        if not self.conn:
+            return []
+        return SchemaManager(self.conn).explain_queries()
+
+    def has_column(self, column):
+        """
+        production_plan テーブルに指定カラムが存在するか（結果はキャッシュする）
+        """
+        if self._columns is None:
+            if not self.conn:
+                return False
+            try:
+                rows = self.conn.execute("PRAGMA table_info(production_plan)").fetchall()
+                self._columns = {row["name"] for row in rows}
+            except sqlite3.Error as e:
+                print(f"Failed to read table info: {e}")
+                return False
+        return column in self._columns
+
+    def get_change_token(self):
+        """
+        他の接続によるコミットを検知するための変更トークンを取得する
+        PRAGMA data_version はヘッダを読むだけなので、共有フォルダ越しでも軽量に確認できる
+        :return: 変更トークン（取得失敗時はNone）
+        """
+        if not self.conn:
+            return None
+        try:
+            return self.conn.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Failed to get data version: {e}")
+            return None
+
+    def get_changed_rows(self, acquisition_date, known_versions=None, known_values=None):
+        """
+        指定日の変更された行を取得する
+        updated_at 列がある場合は指定日の (id, updated_at) を画面の行と突き合わせ、updated_at が異なる行・新しい行だけを返す
+        updated_at が未設定の行（取り込み処理が時刻を書き込まない場合）は、画面の値と比べて変わっていた行だけを返す
+        updated_at は各端末の時計で書き込まれるため、時刻の大小では判定しない
+        行が削除されていた場合・updated_at 列が無い場合は指定日の全行を返す
+        :param acquisition_date: YYYY-MM-DD形式の日付文字列
+        :param known_versions: 画面に表示している行の id -> updated_at
+        :param known_values: 画面に表示している updated_at が未設定の行の id -> 列名と値の辞書
+        :return: (行のリスト, 差分のみかどうか, エラーメッセージ) のタプル
+        """
+        if not self.has_column("updated_at") or known_versions is None:
+            data, error = self.get_data_by_date(acquisition_date)
+            return data, False, error
+
+        try:
+            reader = self._reader()
+            # (acquisition_date, updated_at) のインデックスだけで読めるため、テーブル本体は読まない
+            versions = reader.execute(
+                "SELECT id, updated_at FROM production_plan WHERE acquisition_date = ?", (acquisition_date,)
+            ).fetchall()
+            known_values = known_values or {}
+            server_ids = set()
+            fetch_ids = []
+            for record_id, updated_at in versions:
+                server_ids.add(record_id)
+                if known_versions.get(record_id, object()) != updated_at:
+                    fetch_ids.append(record_id)
+                elif updated_at is None:
+                    # updated_at が未設定のままの行は、値を読んで画面と比べる
+                    fetch_ids.append(record_id)
+            if not server_ids.issuperset(known_versions):
+                # 削除された行がある場合は全行を返す（呼び出し側で全件を読み直す）
+                data, error = self.get_data_by_date(acquisition_date)
+                return data, False, error
+
+            rows = []
+            fetch_ids.sort()
+            # SQLiteのパラメータ数の上限を超えないよう分割して取得する
+            for start in range(0, len(fetch_ids), 500):
+                chunk = fetch_ids[start:start + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                cursor = reader.execute(f"SELECT * FROM production_plan WHERE id IN ({placeholders}) ORDER BY id", chunk)
+                for row in rows_from_cursor(cursor):
+                    known = known_values.get(row["id"]) if row["updated_at"] is None else None
+                    if known is None or any(known.get(column) != value for column, value in row.items()):
+                        rows.append(row)
+            return rows, True, None
+        except sqlite3.Error as e:
+            error_msg = f"変更データ取得失敗: {e}"
+            print(error_msg)
+            return None, True, error_msg
+
     def get_data_by_date(self, acquisition_date):
         """
         指定された取得日でデータを取得する
@@ -34,104 +303,247 @@ class DatabaseHandler:
             return None, "データベースに接続されていません。"
         
         # 要件定義書のサンプルクエリ。テーブル名が異なる可能性がある。
-        query = "SELECT * FROM production_plan WHERE acquisition_date = ?"
+        # 使われるインデックスによって行の順序が変わらないよう、画面の並び（id順）を明示する
+        query = "SELECT * FROM production_plan WHERE acquisition_date = ? ORDER BY id"
         try:
-            cursor = self.conn.cursor()
+            cursor = self._reader().cursor()
             cursor.execute(query, (acquisition_date,))
-            rows = cursor.fetchall()
-            # sqlite3.Rowオブジェクトを辞書のリストに変換
-            data = [dict(row) for row in rows]
+            # カラム構成を共有する PlanRow のリストに変換（行ごとに辞書を作るよりメモリ消費が少ない）
+            data = rows_from_cursor(cursor)
             return data, None
         except sqlite3.Error as e:
             error_msg = f"データ取得失敗: {e}"
             print(error_msg)
             return None, error_msg
 
-    def update_record(self, record_id, column, value):
+    def get_rows_page(self, start_date, end_date, after=None, limit=200):
+        """
+        期間内の行を (取得日, id) の順に1ページ分取得する（キーセット方式のページング）
+        OFFSETを使わず前ページの最後の行の続きから読むため、後ろのページでも読み飛ばしが発生しない
+        :param after: 前ページの最後の行の (取得日, id)。最初のページはNone
+        :return: (行のリスト, エラーメッセージ) のタプル
+        """
         if not self.conn:
-            return False
+            return None, "データベースに接続されていません。"
 
-        # 'id' カラムを主キーと仮定
-        query = f"UPDATE production_plan SET {column} = ? WHERE id = ?"
-        
+        query = "SELECT * FROM production_plan WHERE acquisition_date BETWEEN ? AND ?"
+        params = [start_date, end_date]
+        if after is not None:
+            query += " AND (acquisition_date > ? OR (acquisition_date = ? AND id > ?))"
+            params += [after[0], after[0], after[1]]
+        query += " ORDER BY acquisition_date, id LIMIT ?"
+        params.append(limit)
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(query, (value, record_id))
-            self.conn.commit()
-            print(f"Record {record_id} updated. Set {column} to {value}")
-            return True
+            cursor = self._reader().cursor()
+            cursor.execute(query, params)
+            return rows_from_cursor(cursor), None
         except sqlite3.Error as e:
-            print(f"Failed to update record: {e}")
-            self.conn.rollback()
-            return False
+            error_msg = f"期間データ取得失敗: {e}"
+            print(error_msg)
+            return None, error_msg
+
+    def _keep_previous(self, old_value, new_value):
+        self._previous_value = old_value
+        return new_value
 
-    def copy_cleaning_instructions(self, source_date, destination_date):
+    def _update_returning_old(self, cursor, record_id, column, value):
         """
-        ある日付の洗浄指示を別の日付にコピーする
-        :param source_date: YYYY-MM-DD形式のコピー元日付
-        :param destination_date: YYYY-MM-DD形式のコピー先日付
-        :return: (成功したかどうか, 更新した件数またはエラーメッセージ)
+        1件のセルを更新し、更新前の値を返す（コミットは呼び出し側で行う）
+        :return: (レコードが存在したかどうか, 更新前の値)
+        """
+        # updated_at 列がある場合は他端末が差分を検知できるよう更新時刻も書き込む
+        touch, params = "", (value, record_id)
+        if self.has_column("updated_at"):
+            touch, params = ", updated_at = ?", (value, now_timestamp(), record_id)
+
+        plain_query = f"UPDATE production_plan SET {column} = ?{touch} WHERE id = ?"
+        self._queue_mirror_write(plain_query, params)
+
+        if SUPPORTS_RETURNING:
+            # RETURNINGは更新後の値しか参照できないため、SET式の中で更新前の値を受け取って返す
+            query = (f"UPDATE production_plan SET {column} = keep_previous({column}, ?){touch} "
+                     f"WHERE id = ? RETURNING previous_value() AS old_value")
+            cursor.execute(query, params)
+            row = cursor.fetchone()
+            return (True, row["old_value"]) if row else (False, None)
+
+        cursor.execute(f"SELECT {column} FROM production_plan WHERE id = ?", (record_id,))
+        row = cursor.fetchone()
+        if not row:
+            return False, None
+        cursor.execute(plain_query, params)
+        return True, row[column]
+
+    def _update_if_unchanged(self, cursor, record_id, column, value, expected_updated_at, updated_at):
+        """
+        行の updated_at が expected_updated_at のままの場合だけ1件のセルを更新する（コミットは呼び出し側で行う）
+        :return: (更新したかどうか, 更新前の値, 更新できなかった場合は現在の行（削除されていた場合はNone）)
+        """
+        condition_params = (value, updated_at, record_id, expected_updated_at)
+        # ミラーには共有DBで更新できた場合だけ同じ値を書き込む
+        mirror_query = f"UPDATE production_plan SET {column} = ?, updated_at = ? WHERE id = ?"
+        mirror_params = (value, updated_at, record_id)
+
+        if SUPPORTS_RETURNING:
+            query = (f"UPDATE production_plan SET {column} = keep_previous({column}, ?), updated_at = ? "
+                     f"WHERE id = ? AND updated_at IS ? RETURNING previous_value() AS old_value")
+            cursor.execute(query, condition_params)
+            row = cursor.fetchone()
+            if row:
+                self._queue_mirror_write(mirror_query, mirror_params)
+                return True, row["old_value"], None
+        else:
+            cursor.execute(f"SELECT {column}, updated_at FROM production_plan WHERE id = ?", (record_id,))
+            row = cursor.fetchone()
+            if row and row["updated_at"] == expected_updated_at:
+                cursor.execute(f"UPDATE production_plan SET {column} = ?, updated_at = ? WHERE id = ? AND updated_at IS ?",
+                               condition_params)
+                self._queue_mirror_write(mirror_query, mirror_params)
+                return True, row[column], None
+
+        # 他端末で更新されていた（または削除されていた）行だけを読み直して返す
+        cursor.execute("SELECT * FROM production_plan WHERE id = ?", (record_id,))
+        current = rows_from_cursor(cursor)
+        return False, None, current[0] if current else None
+
+    def update_records_checked(self, changes):
         """
+        複数のセル更新を楽観的排他制御付きで1つのトランザクションにまとめて反映する
+        各行は読み込んだ時点の updated_at のままの場合だけ更新し、他端末で更新されていた行は書き込まずに現在の行を返す
+        updated_at 列が無い場合は update_records と同じく無条件に更新する
+        :param changes: (record_id, column, value, 読み込んだ時点の updated_at) のリスト
+        :return: (成功したかどうか, 結果の辞書またはエラーメッセージ)
+                 結果の辞書は applied: (record_id, column, 更新前の値, 更新後の値) のリスト、
+                 conflicts: (更新できなかった変更, 現在の行) のリスト、updated_at: 書き込んだ updated_at
+        """
+        if not self.has_column("updated_at"):
+            success, result = self.update_records([change[:3] for change in changes])
+            if not success:
+                return False, result
+            return True, {"applied": result, "conflicts": [], "updated_at": None}
         if not self.conn:
             return False, "データベースに接続されていません。"
 
-        # 1. コピー元の洗浄指示を取得 (機番をキーにした辞書を作成)
-        source_query = "SELECT machine_no, cleaning_instruction FROM production_plan WHERE acquisition_date = ? AND cleaning_instruction IS NOT NULL AND cleaning_instruction != ''"
+        updated_at = now_timestamp()
+        applied, conflicts = [], []
+        written = set()
         try:
             cursor = self.conn.cursor()
-            cursor.execute(source_query, (source_date,))
-            source_rows = cursor.fetchall()
-            source_instructions = {row['machine_no']: row['cleaning_instruction'] for row in source_rows}
+            self.conn.execute("BEGIN IMMEDIATE")
+            for change in changes:
+                record_id, column, value, expected_updated_at = change
+                if record_id in written:
+                    # 同じ行の別のセルは、このトランザクションで書き込んだ updated_at を基準にする
+                    expected_updated_at = updated_at
+                found, old_value, current = self._update_if_unchanged(
+                    cursor, record_id, column, value, expected_updated_at, updated_at)
+                if found:
+                    applied.append((record_id, column, old_value, value))
+                    written.add(record_id)
+                else:
+                    conflicts.append((change, current))
+            self.conn.commit()
+            self._apply_mirror_writes()
+            print(f"{len(applied)} records updated in one transaction ({len(conflicts)} conflicts).")
+            return True, {"applied": applied, "conflicts": conflicts, "updated_at": updated_at}
         except sqlite3.Error as e:
-            return False, f"コピー元データの取得に失敗: {e}"
-
-        if not source_instructions:
-            return False, "コピー元の有効な洗浄指示データがありません。"
+            print(f"Failed to update records: {e}")
+            self.conn.rollback()
+            self._apply_mirror_writes(committed=False)
+            return False, f"一括更新に失敗: {e}"
 
-        # 2. コピー先のレコードを取得
-        dest_query = "SELECT id, machine_no FROM production_plan WHERE acquisition_date = ?"
-        try:
-            cursor.execute(dest_query, (destination_date,))
-            dest_rows = cursor.fetchall()
-        except sqlite3.Error as e:
-            return False, f"コピー先データの取得に失敗: {e}"
+    def update_records(self, changes):
+        """
+        複数のセル更新を1つのトランザクションでまとめて反映する
+        :param changes: (record_id, column, value) のリスト
+        :return: (成功したかどうか, (record_id, column, 更新前の値, 更新後の値) のリストまたはエラーメッセージ)
+        """
+        if not self.conn:
+            return False, "データベースに接続されていません。"
+        if not changes:
+            return True, []
 
-        # 3. トランザクション内で更新処理
-        update_query = "UPDATE production_plan SET cleaning_instruction = ? WHERE id = ?"
-        updated_count = 0
+        applied = []
         try:
-            self.conn.execute("BEGIN TRANSACTION")
-            for row in dest_rows:
-                machine_no = row['machine_no']
-                record_id = row['id']
-                if machine_no in source_instructions:
-                    new_instruction = source_instructions[machine_no]
-                    cursor.execute(update_query, (new_instruction, record_id))
-                    updated_count += 1
+            cursor = self.conn.cursor()
+            self.conn.execute("BEGIN IMMEDIATE")
+            for record_id, column, value in changes:
+                found, old_value = self._update_returning_old(cursor, record_id, column, value)
+                if found:
+                    applied.append((record_id, column, old_value, value))
             self.conn.commit()
-            return True, updated_count
+            self._apply_mirror_writes()
+            print(f"{len(applied)} records updated in one transaction.")
+            return True, applied
         except sqlite3.Error as e:
+            print(f"Failed to update records: {e}")
             self.conn.rollback()
-            return False, f"データベースの更新に失敗: {e}"
+            self._apply_mirror_writes(committed=False)
+            return False, f"一括更新に失敗: {e}"
 
-    def get_record_value(self, record_id, column):
+    def copy_cleaning_instructions(self, source_date, destination_dates):
         """
-        指定されたレコードの特定カラムの現在値を取得（Undo/Redo履歴用）
-        :param record_id: レコードID
-        :param column: カラム名
-        :return: 現在の値（取得失敗時はNone）
+        ある日付の洗浄指示を別の日付（複数可）にコピーする
+        同じ機番の行へ1つのUPDATE文でまとめて反映する（コピー元に同じ機番が複数ある場合はIDが最大の行を使用）
+        :param source_date: YYYY-MM-DD形式のコピー元日付
+        :param destination_dates: YYYY-MM-DD形式のコピー先日付、またはそのリスト
+        コピー先の行の読み取りと更新は同じ書き込みトランザクション（BEGIN IMMEDIATE）の中で行うため、
+        他端末の更新を上書きで失うことはない
+        :return: (成功したかどうか, 結果の辞書またはエラーメッセージ)
+                 結果の辞書は applied: (record_id, 'cleaning_instruction', 更新前の値, 更新後の値) のリスト、
+                 updated_at: 書き込んだ updated_at（列が無い場合はNone）
         """
         if not self.conn:
-            return None
-        
-        query = f"SELECT {column} FROM production_plan WHERE id = ?"
+            return False, "データベースに接続されていません。"
+        if isinstance(destination_dates, str):
+            destination_dates = [destination_dates]
+        destination_dates = [date for date in destination_dates if date != source_date]
+        if not destination_dates:
+            return False, "コピー先の日付がありません。"
+
+        source_filter = "acquisition_date = ? AND cleaning_instruction IS NOT NULL AND cleaning_instruction != ''"
+        touch, touch_params, updated_at = "", (), None
+        if self.has_column("updated_at"):
+            updated_at = now_timestamp()
+            touch, touch_params = ", updated_at = ?", (updated_at,)
+        placeholders = ", ".join("?" for _ in destination_dates)
+        # コピー先の各行について、同じ機番のコピー元の洗浄指示を相関サブクエリで取得する
+        update_query = f"""
+            UPDATE production_plan SET cleaning_instruction = (
+                SELECT src.cleaning_instruction FROM production_plan AS src
+                WHERE src.acquisition_date = ? AND src.machine_no = production_plan.machine_no
+                  AND src.cleaning_instruction IS NOT NULL AND src.cleaning_instruction != ''
+                ORDER BY src.id DESC LIMIT 1
+            ){touch}
+            WHERE acquisition_date IN ({placeholders})
+              AND machine_no IN (SELECT machine_no FROM production_plan WHERE {source_filter})
+        """
+        params = (source_date,) + touch_params + tuple(destination_dates) + (source_date,)
+        # 元に戻せるよう、UPDATEと同じ条件で対象行の更新前・更新後の値を読む
+        target_query = f"""
+            SELECT id, cleaning_instruction FROM production_plan
+            WHERE acquisition_date IN ({placeholders})
+              AND machine_no IN (SELECT machine_no FROM production_plan WHERE {source_filter})
+        """
+        target_params = tuple(destination_dates) + (source_date,)
+
         try:
             cursor = self.conn.cursor()
-            cursor.execute(query, (record_id,))
-            row = cursor.fetchone()
-            if row:
-                return row[column]
-            return None
+            self.conn.execute("BEGIN IMMEDIATE")
+            cursor.execute(f"SELECT 1 FROM production_plan WHERE {source_filter} LIMIT 1", (source_date,))
+            if cursor.fetchone() is None:
+                self.conn.rollback()
+                return False, "コピー元の有効な洗浄指示データがありません。"
+            old_values = dict(cursor.execute(target_query, target_params).fetchall())
+            cursor.execute(update_query, params)
+            new_values = dict(cursor.execute(target_query, target_params).fetchall())
+            self._queue_mirror_write(update_query, params)
+            self.conn.commit()
+            self._apply_mirror_writes()
+            applied = [(record_id, "cleaning_instruction", old_values.get(record_id), value)
+                       for record_id, value in new_values.items()]
+            return True, {"applied": applied, "updated_at": updated_at}
         except sqlite3.Error as e:
-            print(f"Failed to get record value: {e}")
-            return None
\ No newline at end of file
+            self.conn.rollback()
+            self._apply_mirror_writes(committed=False)
+            return False, f"データベースの更新に失敗: {e}"
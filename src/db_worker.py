@@ -0,0 +1,140 @@
+import itertools
+import queue
+import threading
+
+from PySide6.QtCore import QThread, Signal, Slot
+
+from database import DatabaseHandler
+
+class DatabaseWorker(QThread):
+    """
+    共有DBへのアクセスをGUIスレッドから切り離すワーカースレッド
+    専用の接続をスレッド内で保持し、キューに積まれた要求を順番に処理して結果をシグナルで返す
+    """
+    connection_finished = Signal(bool)
+    request_finished = Signal(int, object, object)  # request_id, 結果, エラーメッセージ
+    request_cancelled = Signal(int, str)  # request_id, 種別
+    progress = Signal(str, int)  # 実行中の要求種別, 残りの要求数
+
+    _STOP = object()
+
+    def __init__(self, db_path, mirror=None, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.mirror = mirror
+        self._queue = queue.Queue()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._cancelled = set()
+        self._kinds = {}  # request_id -> 種別（未完了の要求のみ）
+        self._current_id = None
+        self._handler = None
+        # コールバックはGUIスレッド側でのみ参照する
+        self._callbacks = {}
+        self.request_finished.connect(self._dispatch_result)
+        self.request_cancelled.connect(self._dispatch_cancel)
+
+    def run(self):
+        self._handler = DatabaseHandler(self.db_path, mirror=self.mirror)
+        self.connection_finished.emit(self._handler.connect())
+
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+            request_id, kind, task, args = item
+
+            with self._lock:
+                if request_id in self._cancelled:
+                    self._cancelled.discard(request_id)
+                    self._kinds.pop(request_id, None)
+                    self.request_cancelled.emit(request_id, kind)
+                    continue
+                self._current_id = request_id
+
+            self.progress.emit(kind, self._queue.qsize())
+            result, error = None, None
+            try:
+                if callable(task):
+                    result = task(self._handler, *args)
+                else:
+                    result = getattr(self._handler, task)(*args)
+            except Exception as e:
+                error = f"{kind} の実行に失敗: {e}"
+                print(error)
+
+            with self._lock:
+                self._current_id = None
+                self._kinds.pop(request_id, None)
+                cancelled = request_id in self._cancelled
+                self._cancelled.discard(request_id)
+
+            if cancelled:
+                self.request_cancelled.emit(request_id, kind)
+            else:
+                self.request_finished.emit(request_id, result, error)
+            self.progress.emit("", self._queue.qsize())
+
+        self._handler.close()
+        self._handler = None
+
+    def submit(self, kind, task, *args, callback=None):
+        """
+        要求をキューに追加する
+        :param kind: 要求の種別（キャンセルや進捗表示に使用）
+        :param task: DatabaseHandlerのメソッド名、または handler を第1引数に受け取る関数
+        :param callback: 完了時にGUIスレッドで呼ばれる関数 callback(result, error)
+        :return: 要求ID
+        """
+        request_id = next(self._ids)
+        if callback is not None:
+            self._callbacks[request_id] = callback
+        with self._lock:
+            self._kinds[request_id] = kind
+        self._queue.put((request_id, kind, task, args))
+        return request_id
+
+    def cancel(self, request_id):
+        """指定した要求をキャンセルする（実行中の場合はクエリを中断する）"""
+        with self._lock:
+            if request_id not in self._kinds:
+                return False
+            self._cancelled.add(request_id)
+            if request_id == self._current_id and self._handler:
+                self._handler.interrupt()
+        return True
+
+    def cancel_kind(self, kind):
+        """指定した種別の未完了の要求をすべてキャンセルする"""
+        with self._lock:
+            request_ids = [rid for rid, k in self._kinds.items() if k == kind]
+        for request_id in request_ids:
+            self.cancel(request_id)
+        return len(request_ids)
+
+    def pending_count(self, kind=None):
+        """未完了の要求数を返す"""
+        with self._lock:
+            if kind is None:
+                return len(self._kinds)
+            return sum(1 for k in self._kinds.values() if k == kind)
+
+    def stop(self, wait_ms=10000):
+        """
+        キューに残った要求を処理し終えてからスレッドを終了する
+        :return: 時間内に終了した場合True
+        """
+        if not self.isRunning():
+            return True
+        self._queue.put(self._STOP)
+        return self.wait(wait_ms)
+
+    @Slot(int, object, object)
+    def _dispatch_result(self, request_id, result, error):
+        callback = self._callbacks.pop(request_id, None)
+        if callback is not None:
+            callback(result, error)
+
+    @Slot(int, str)
+    def _dispatch_cancel(self, request_id, kind):
+        self._callbacks.pop(request_id, None)
@@ -0,0 +1,93 @@
+import datetime
+import json
+import os
+
+from row_store import PlanRow, RowSchema
+
+APP_DIR_NAME = "洗浄依頼管理App"
+
+def get_app_data_dir():
+    """
+    ユーザープロファイル内のアプリ用データフォルダを取得（無ければ作成する）
+    :return: フォルダのパス（作成できない場合はNone）
+    """
+    base_dir = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    app_dir = os.path.join(base_dir, APP_DIR_NAME)
+    try:
+        os.makedirs(app_dir, exist_ok=True)
+    except OSError as e:
+        print(f"Failed to create app data folder: {e}")
+        return None
+    return app_dir
+
+class LocalSnapshotStore:
+    """
+    最後に読み込んだ日付のデータをローカルのJSONファイルに保存する
+    起動直後に共有DBを待たずに画面を表示するために使う（内容は古い可能性がある）
+    保存先のフォルダを作成できない場合は何も保存・表示しない
+    """
+
+    def __init__(self, path=None, max_dates=3):
+        if path is None:
+            app_dir = get_app_data_dir()
+            path = os.path.join(app_dir, "snapshot.json") if app_dir else None
+        self.path = path
+        self.max_dates = max_dates
+
+    def load(self, acquisition_date):
+        """
+        保存済みのデータを読み込む
+        :return: (行のリスト, 保存日時の文字列) のタプル。無い場合はNone
+        """
+        snapshots = self._read()
+        entry = snapshots.get(acquisition_date)
+        if not entry:
+            return None
+        columns = entry["columns"]
+        schema = RowSchema(columns)
+        rows = [PlanRow(schema, values) for values in entry["rows"]]
+        return rows, entry.get("saved_at")
+
+    def save(self, days):
+        """
+        日付ごとのデータを保存する（新しいものを優先して max_dates 日分まで残す）
+        :param days: (取得日, 行のリスト) のリスト。先頭ほど優先して残す
+        """
+        if self.path is None:
+            return
+        snapshots = self._read()
+        saved_at = datetime.datetime.now().isoformat(sep=' ', timespec='seconds')
+        for acquisition_date, rows in reversed(days):
+            if not rows:
+                continue
+            # 列名は1回だけ保存し、各行は値のリストにしてファイルを小さくする
+            columns = list(rows[0].keys())
+            snapshots.pop(acquisition_date, None)
+            snapshots[acquisition_date] = {
+                "saved_at": saved_at,
+                "columns": columns,
+                "rows": [[row.get(column) for column in columns] for row in rows],
+            }
+        # 辞書は挿入順を保つので、末尾（最近保存したもの）から残す
+        keep = list(snapshots)[-self.max_dates:]
+        snapshots = {date: snapshots[date] for date in keep}
+
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshots, f, ensure_ascii=False, separators=(',', ':'), default=str)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Failed to save local snapshot: {e}")
+
+    def _read(self):
+        if self.path is None:
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Failed to read local snapshot: {e}")
+            return {}
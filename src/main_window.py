@@ -1,20 +1,38 @@
 import sys
 import collections
+import unicodedata
 from PySide6.QtWidgets import (
     QMainWindow, QApplication, QWidget, QVBoxLayout, 
     QTableView, QDateEdit, QPushButton,
     QHBoxLayout, QStatusBar, QLabel, QMessageBox, QHeaderView,
     QTableWidget, QTableWidgetItem, QStackedWidget, QButtonGroup, QSizePolicy, QScrollArea,
-    QStyle
+    QStyle, QLineEdit, QComboBox
 )
-from PySide6.QtCore import QDate, Slot, Qt, QModelIndex, QTimer
+from PySide6.QtCore import QCoreApplication, QDate, Slot, Qt, QModelIndex, QTimer, QEvent
 from PySide6.QtGui import QShortcut, QKeySequence
 
 from config import load_config
-from database import DatabaseHandler
-from models import MainTableModel, CleaningInstructionTableModel, EditableComboBoxDelegate, UnprocessedMachineNumbersTableModel, CleaningInstructionDelegate
+from db_worker import DatabaseWorker
+from write_queue import WriteBehindQueue
+from change_tracker import ChangeTracker
+from snapshot_cache import DateSnapshotCache
+from local_snapshot import LocalSnapshotStore
+from offline_journal import OfflineJournal
+from search_index import SearchIndex
+from refresh_scheduler import RefreshScheduler
+from undo_history import UndoHistory, UndoOperation
+from table_layout import TableLayoutManager
+from models import MainTableModel, RowRangeProxyModel, SearchFilterProxyModel, CleaningInstructionTableModel, PagedRangeTableModel, EditableComboBoxDelegate, UnprocessedMachineNumbersTableModel, CleaningInstructionDelegate, CLEANING_INSTRUCTION_VALUES
 
 class MainWindow(QMainWindow):
+    # 洗浄指示管理ページの並び順の選択肢 (表示名, 並べ替えるカラム)。各カラムの同じ値の中は機番の数値順
+    CLEANING_SORT_ORDERS = (
+        ("DBの順", None),
+        ("ライン・機番順", "machine_no"),
+        ("洗浄指示の優先度順", "cleaning_instruction"),
+        ("セット予定日順", "set_date"),
+    )
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("洗浄依頼管理App")
@@ -28,28 +46,111 @@ class MainWindow(QMainWindow):
 
         self.design_config = self.config.get("design", {})
 
-        self.db_handler = DatabaseHandler(self.config['database']['path'])
+        # DBアクセスはすべて専用スレッドで実行する（共有フォルダの遅延でUIを止めない）
+        self.db_worker = DatabaseWorker(
+            self.config['database']['path'],
+            mirror=self.config['database'].get('mirror'),
+            parent=self
+        )
+        self.db_worker.connection_finished.connect(self.on_db_connection_finished)
+        self.db_worker.progress.connect(self.update_db_progress)
+
+        # セル編集は一定時間まとめてから1トランザクションで書き込む
+        self.write_queue = WriteBehindQueue(
+            self.db_worker,
+            window_ms=self.config['database'].get('write_batch_window_ms', 300),
+            version_of=self._row_version,
+            parent=self
+        )
+        self.write_queue.flush_finished.connect(self.on_writes_flushed)
+        self.write_queue.flush_failed.connect(self.on_writes_failed)
+
+        # 他端末の変更は変更トークンで検知し、変わった行だけを画面に反映する
+        # 変更が無い間・背面にある間は確認の間隔を広げ、共有フォルダへの負荷を抑える
+        sync_config = self.config.get('sync', {})
+        self.change_tracker = ChangeTracker(
+            self.db_worker,
+            interval_ms=sync_config.get('poll_interval_ms', 3000),
+            is_busy=lambda: self.write_queue.pending_count() > 0,
+            max_interval_ms=sync_config.get('max_poll_interval_ms', 15000),
+            background_interval_ms=sync_config.get('background_poll_interval_ms', 30000),
+            budget=sync_config.get('poll_budget', 0.02),
+            parent=self
+        )
+        self.change_tracker.rows_changed.connect(self.apply_remote_changes)
+
+        # 編集・元に戻す・他端末の変更による画面更新は、一定間隔ごとに1回の最小限の更新にまとめる
+        self.refresh_scheduler = RefreshScheduler(
+            interval_ms=self.config.get('refresh', {}).get('interval_ms', 50),
+            parent=self
+        )
+        # テーブルの高さ・列幅は全セルを測らず、行数と標本の行の文字列から求める
+        self.table_layout = TableLayoutManager(
+            sample_rows=self.config.get('table_layout', {}).get('sample_rows', 200)
+        )
+        self.refresh_scheduler.refresh_requested.connect(self.run_scheduled_refresh)
 
-        # Undo/Redo履歴管理
-        self.operation_history = []  # [(record_id, column, old_value, new_value), ...]
-        self.undo_stack_pointer = 0  # 現在の位置
-        self.max_history_size = 50   # 最大履歴サイズ
+        # 日付ごとのデータをメモリに保持し、前後の日付は裏で先読みしておく
+        cache_config = self.config.get('cache', {})
+        self.snapshot_cache = DateSnapshotCache(
+            max_dates=cache_config.get('max_dates', 14),
+            max_rows=cache_config.get('max_rows', 5000)
+        )
+        self.change_tracker.token_updated.connect(self.snapshot_cache.update_token)
+        self.change_tracker.token_updated.connect(self.on_change_token_updated)
+
+        # 前回読み込んだデータをローカルに保存しておき、起動直後はそれを表示する
+        self.local_snapshot = LocalSnapshotStore(max_dates=cache_config.get('local_snapshot_dates', 3))
+        self._stale_snapshot_date = None
+
+        # 共有DBに書き込めない間はローカルのジャーナルに記録し、再接続後にまとめて再適用する
+        self.offline_journal = OfflineJournal()
+        self.offline = False
+        self.reconnect_timer = QTimer(self)
+        self.reconnect_timer.setInterval(self.config.get('offline', {}).get('retry_interval_ms', 10000))
+        self.reconnect_timer.timeout.connect(self.try_reconnect)
+        self._reconnecting = False
+        self._schema_checked = False
+        self._closing_after_worker = False  # DBワーカーの終了を待ってから閉じ直す場合True
+
+        # Undo/Redo履歴管理（上限を超えた古い操作は捨てる）
+        self.undo_history = UndoHistory(max_size=50)
 
         self.setup_ui()
 
         # --- モデルの初期化 ---
-        self.main_models = {
-            'left': MainTableModel(config=self.config),
-            'center': MainTableModel(config=self.config),
-            'right': MainTableModel(config=self.config)
+        # 文字検索用の索引（当日の行から作成し、Mainページと洗浄指示管理ページで共有する）
+        self.search_index = SearchIndex()
+
+        # Mainページは1つのモデルを行範囲のプロキシで左・中央・右に分けて表示する（文字検索の絞り込み後に分割）
+        self.main_model = MainTableModel(config=self.config)
+        self.main_search_proxy = SearchFilterProxyModel(self.main_model, parent=self)
+        self.main_pane_rows = self.config.get('main_page', {}).get('pane_rows', 20)
+        self.main_proxies = {
+            'left': RowRangeProxyModel(self.main_search_proxy, parent=self),
+            'center': RowRangeProxyModel(self.main_search_proxy, parent=self),
+            'right': RowRangeProxyModel(self.main_search_proxy, parent=self)
         }
-        self.main_table_view_left.setModel(self.main_models['left'])
-        self.main_table_view_center.setModel(self.main_models['center'])
-        self.main_table_view_right.setModel(self.main_models['right'])
+        self._update_main_pane_ranges(0)
+        self.main_table_view_left.setModel(self.main_proxies['left'])
+        self.main_table_view_center.setModel(self.main_proxies['center'])
+        self.main_table_view_right.setModel(self.main_proxies['right'])
 
         # 洗浄指示管理ページ用の単一モデル
         self.cleaning_model = CleaningInstructionTableModel(config=self.config)
-        self.cleaning_table_view.setModel(self.cleaning_model)
+        self.cleaning_search_proxy = SearchFilterProxyModel(self.cleaning_model, parent=self)
+        self.cleaning_table_view.setModel(self.cleaning_search_proxy)
+        # ヘッダーのクリックで並べ替え（最初はDBの並び順）
+        self.cleaning_table_view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.cleaning_table_view.horizontalHeader().setSortIndicatorClearable(True)
+        self.cleaning_table_view.setSortingEnabled(True)
+
+        # 期間表示（複数日の参照専用）。スクロールに合わせてページ単位で読み込む
+        self.range_model = PagedRangeTableModel(
+            self.db_worker, config=self.config,
+            page_size=self.config.get('range_view', {}).get('page_size', 200), parent=self
+        )
+        self.range_table_view.setModel(self.range_model)
 
         self.manufacturing_unprocessed_model = UnprocessedMachineNumbersTableModel(check_column='manufacturing_check', config=self.config)
         self.manufacturing_unprocessed_table_view.setModel(self.manufacturing_unprocessed_model)
@@ -57,26 +158,38 @@ class MainWindow(QMainWindow):
         self.cleaning_unprocessed_model = UnprocessedMachineNumbersTableModel(check_column='cleaning_check', config=self.config)
         self.cleaning_unprocessed_table_view.setModel(self.cleaning_unprocessed_model)
         
-        self.all_models = list(self.main_models.values()) + [self.cleaning_model]
+        self.all_models = [self.main_model, self.cleaning_model]
         self.all_table_views = [self.main_table_view_left, self.main_table_view_center, self.main_table_view_right, self.cleaning_table_view, self.manufacturing_unprocessed_table_view, self.cleaning_unprocessed_table_view]
 
         for view in self.all_table_views:
             view.setAlternatingRowColors(True);
+        for view in self.all_table_views + [self.range_table_view]:
+            self.table_layout.set_uniform_rows(view)
+
+        self.write_queue.pending_count_changed.connect(self.update_pending_writes_label)
 
         self.setup_delegates()
         self.setup_table_columns()
 
+        self.show_local_snapshot()
         self.connect_to_db_and_load_data()
 
         # --- シグナルとスロットの接続 ---
         self.page_button_group.idClicked.connect(self.pages_stack.setCurrentIndex)
         self.page_button_group.idClicked.connect(self.toggle_unprocessed_widget_visibility)
         self.date_edit.dateChanged.connect(self.load_data_for_selected_date)
+        self.search_edit.textChanged.connect(self.apply_search)
         self.copy_instructions_button.clicked.connect(self.handle_copy_instructions)
+        self.cleaning_sort_combo.currentIndexChanged.connect(self.apply_cleaning_sort_order)
+        self.range_show_button.clicked.connect(self.show_date_range)
+        self.range_close_button.clicked.connect(self.close_date_range)
+        self.range_model.page_loaded.connect(self._on_range_page_loaded)
+        self.range_model.page_failed.connect(self._on_range_page_failed)
         
         for model in self.all_models:
             model.db_update_signal.connect(self.update_database_record)
             model.data_changed_for_unprocessed_list.connect(self.refresh_unprocessed_list_from_model)
+        self.cleaning_model.db_batch_update_signal.connect(self.update_database_records)
 
         for view in self.all_table_views:
             view.clicked.connect(self.handle_table_click)
@@ -108,6 +221,12 @@ class MainWindow(QMainWindow):
         """)
         top_controls_layout.addWidget(date_label)
         top_controls_layout.addWidget(self.date_edit)
+        # 文字検索（品番・品名・客先名の部分一致）
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("品番・品名・客先名で検索")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.setMinimumWidth(220)
+        top_controls_layout.addWidget(self.search_edit)
         top_controls_layout.addStretch()
 
         # --- ページ切り替えボタン ---
@@ -195,16 +314,54 @@ class MainWindow(QMainWindow):
         self.destination_date_edit = QDateEdit(QDate.currentDate())
         self.destination_date_edit.setCalendarPopup(True)
         copy_layout.addWidget(self.destination_date_edit)
+        # 終了日を指定すると期間内のすべての日付にまとめて複製する（金曜 → 土〜月 など）
+        copy_layout.addWidget(QLabel("〜"))
+        self.destination_end_date_edit = QDateEdit(QDate.currentDate())
+        self.destination_end_date_edit.setCalendarPopup(True)
+        copy_layout.addWidget(self.destination_end_date_edit)
+        self.destination_date_edit.dateChanged.connect(self._on_destination_start_changed)
         self.copy_instructions_button = QPushButton("洗浄指示を複製")
         self.copy_instructions_button.setIcon(self.style().standardIcon(QStyle.SP_DialogSaveButton))
         copy_layout.addWidget(self.copy_instructions_button)
         copy_layout.addStretch()
+        copy_layout.addWidget(QLabel("並び順:"))
+        self.cleaning_sort_combo = QComboBox()
+        for label, column in self.CLEANING_SORT_ORDERS:
+            self.cleaning_sort_combo.addItem(label, column)
+        copy_layout.addWidget(self.cleaning_sort_combo)
         cleaning_page_layout.addWidget(copy_widget)
+
+        # 期間表示（1か月分などの確認用）
+        range_widget = QWidget()
+        range_layout = QHBoxLayout(range_widget)
+        range_layout.setContentsMargins(0, 0, 0, 0)
+        range_layout.addWidget(QLabel("期間表示:"))
+        today = QDate.currentDate()
+        self.range_start_date_edit = QDateEdit(QDate(today.year(), today.month(), 1))
+        self.range_start_date_edit.setCalendarPopup(True)
+        range_layout.addWidget(self.range_start_date_edit)
+        range_layout.addWidget(QLabel("〜"))
+        self.range_end_date_edit = QDateEdit(QDate(today.year(), today.month(), today.daysInMonth()))
+        self.range_end_date_edit.setCalendarPopup(True)
+        range_layout.addWidget(self.range_end_date_edit)
+        self.range_show_button = QPushButton("期間表示")
+        range_layout.addWidget(self.range_show_button)
+        self.range_close_button = QPushButton("当日表示に戻る")
+        self.range_close_button.setEnabled(False)
+        range_layout.addWidget(self.range_close_button)
+        range_layout.addStretch()
+        cleaning_page_layout.addWidget(range_widget)
         
         # 一括表示用の単一テーブルビュー
         self.cleaning_table_view = QTableView()
         self.cleaning_table_view.setObjectName("cleaning_table_view")
         cleaning_page_layout.addWidget(self.cleaning_table_view)
+        # 期間表示用のテーブルビュー（期間表示中のみ当日分の代わりに表示する）
+        self.range_table_view = QTableView()
+        self.range_table_view.setObjectName("range_table_view")
+        self.range_table_view.setAlternatingRowColors(True)
+        self.range_table_view.setVisible(False)
+        cleaning_page_layout.addWidget(self.range_table_view)
         self.pages_stack.addWidget(cleaning_page_widget)
 
         # --- 未払い出し機番テーブル ---
@@ -261,6 +418,18 @@ class MainWindow(QMainWindow):
         self.setStatusBar(self.status_bar)
         self.status_label = QLabel("準備完了")
         self.status_bar.addWidget(self.status_label)
+        self.db_progress_label = QLabel("")
+        self.status_bar.addPermanentWidget(self.db_progress_label)
+        self.pending_writes_label = QLabel("")
+        self.status_bar.addPermanentWidget(self.pending_writes_label)
+        self.cancel_load_button = QPushButton("読み込み中止")
+        self.cancel_load_button.setVisible(False)
+        self.cancel_load_button.clicked.connect(self.cancel_pending_loads)
+        self.status_bar.addPermanentWidget(self.cancel_load_button)
+        self.reconnect_button = QPushButton("再接続")
+        self.reconnect_button.setVisible(False)
+        self.reconnect_button.clicked.connect(self.try_reconnect)
+        self.status_bar.addPermanentWidget(self.reconnect_button)
 
     def setup_table_columns(self):
         for view in self.all_table_views:
@@ -274,15 +443,9 @@ class MainWindow(QMainWindow):
                 view.horizontalHeader().setFixedHeight(30)
                 continue
 
-            # 洗浄指示管理ページは特別な列幅設定
-            if view == self.cleaning_table_view:
-                # 最初はすべてコンテンツサイズに設定
-                for i in range(model.columnCount()):
-                    header.setSectionResizeMode(i, QHeaderView.ResizeToContents)
-            else:
-                # その他のテーブルはコンテンツサイズに合わせる
-                for i in range(model.columnCount()):
-                    header.setSectionResizeMode(i, QHeaderView.ResizeToContents)
+            # 列幅は読み込み後に table_layout で内容に合わせる（ResizeToContents は変更のたびに全セルを測るため使わない）
+            for i in range(model.columnCount()):
+                header.setSectionResizeMode(i, QHeaderView.Interactive)
 
         # ヘッダーに強調色を設定
         emphasized_header_color = self.design_config.get("highlight_color", "#00BFFF")
@@ -300,13 +463,14 @@ class MainWindow(QMainWindow):
         }
         for col_name, width in fixed_width_columns.items():
             try:
-                col_index = self.main_models['left']._headers.index(col_name)
+                col_index = self.main_model._headers.index(col_name)
                 for view in main_views:
                     view.horizontalHeader().setSectionResizeMode(col_index, QHeaderView.Fixed)
                     view.setColumnWidth(col_index, width)
             except ValueError: pass
 
         # 洗浄指示管理ページの列幅設定（余裕を持たせた幅）
+        self.cleaning_minimum_widths = {}
         if hasattr(self, 'cleaning_model') and self.cleaning_model:
             cleaning_column_widths = {
                 "set_date": 90,           # セット予定日
@@ -330,17 +494,15 @@ class MainWindow(QMainWindow):
                         self.cleaning_table_view.horizontalHeader().setSectionResizeMode(col_index, QHeaderView.Fixed)
                         self.cleaning_table_view.setColumnWidth(col_index, width)
                     else:
-                        # その他のカラムは最小幅を設定して見やすくする
-                        self.cleaning_table_view.horizontalHeader().setSectionResizeMode(col_index, QHeaderView.ResizeToContents)
+                        # その他のカラムは最小幅を設定して見やすくする（内容に合わせる際もこの幅より狭くしない）
                         self.cleaning_table_view.setColumnWidth(col_index, width)
-                        # 最小幅も設定
-                        self.cleaning_table_view.horizontalHeader().setMinimumSectionSize(width)
+                        self.cleaning_minimum_widths[col_index] = width
                 except ValueError: 
                     pass
 
     def setup_delegates(self):
         try:
-            col_index = self.main_models['left']._headers.index("notes")
+            col_index = self.main_model._headers.index("notes")
             items = self.config.get("notes_options", self.config.get("remarks_options", ["出荷無し", "1st外観"]))
             delegate = EditableComboBoxDelegate(items=items, parent=self)
             self.main_table_view_left.setItemDelegateForColumn(col_index, delegate)
@@ -372,7 +534,7 @@ class MainWindow(QMainWindow):
 
     def create_move_to_next_cell_function(self, table_view):
         """テーブルビュー用の次のセルへ移動する関数を作成"""
-        def move_to_next_cell(current_index):
+        def move_to_next_cell(current_index, next_index=None):
             if not current_index.isValid():
                 return
             
@@ -392,6 +554,14 @@ class MainWindow(QMainWindow):
             
             # 洗浄指示カラムでの編集の場合のみ移動
             if current_col == cleaning_instruction_col:
+                if next_index is not None:
+                    # 並べ替えで編集した行が移動した場合も、編集前に次の行だった行へ移動する
+                    if next_index.isValid():
+                        table_view.setCurrentIndex(next_index)
+                        table_view.scrollTo(next_index)
+                        # 前のセルのエディタは閉じ終えているため、すぐに編集を開始する（エディタは使い回される）
+                        table_view.edit(next_index)
+                    return
                 next_row = current_row + 1
                 
                 # 次の行が存在する場合
@@ -414,87 +584,220 @@ class MainWindow(QMainWindow):
         self.redo_shortcut = QShortcut(QKeySequence.Redo, self)
         self.redo_shortcut.activated.connect(self.perform_redo)
 
-    def add_to_history(self, record_id, column, old_value, new_value):
-        """操作履歴を追加"""
-        # 現在のポインタ以降の履歴を削除（新しい操作で上書き）
-        self.operation_history = self.operation_history[:self.undo_stack_pointer]
-        
-        # 新しい操作を追加
-        operation = {
-            'record_id': record_id,
-            'column': column,
-            'old_value': old_value,
-            'new_value': new_value
-        }
-        self.operation_history.append(operation)
-        
-        # 最大サイズを超えた場合、古い履歴を削除
-        if len(self.operation_history) > self.max_history_size:
-            self.operation_history.pop(0)
-        else:
-            self.undo_stack_pointer += 1
-        
-        # ポインタを現在の位置に設定
-        self.undo_stack_pointer = len(self.operation_history)
+        # 洗浄指示管理ページ: 貼り付け・下方向へのコピー・クリア（選択したセルをまとめて1回で保存）
+        # セルの編集中はエディタ側の操作を優先するため、テーブル自体にフォーカスがある場合だけ有効にする
+        for key, handler in ((QKeySequence.Paste, self.paste_into_cleaning_table),
+                             (QKeySequence("Ctrl+D"), self.fill_down_cleaning_table),
+                             (QKeySequence.Delete, self.clear_cleaning_table_cells)):
+            shortcut = QShortcut(key, self.cleaning_table_view)
+            shortcut.setContext(Qt.WidgetShortcut)
+            shortcut.activated.connect(handler)
+
+        # Ctrl+Shift+D: DB診断（スキーマとクエリの実行計画）
+        self.diagnostics_shortcut = QShortcut(QKeySequence("Ctrl+Shift+D"), self)
+        self.diagnostics_shortcut.activated.connect(self.show_db_diagnostics)
+
+    def add_to_history(self, changes, label=None, dates=None, versions=None):
+        """
+        操作履歴を追加（変更前と変更後が同じセルは除く）
+        :param changes: (record_id, column, old_value, new_value) のリスト。複数のセルの変更は1つの操作になる
+        :param label: ステータス表示用の操作名（省略時はカラム名または件数）
+        :param dates: 変更した行の取得日（省略時は表示中・キャッシュ中のデータから調べる）
+        :param versions: 表示していない行の、書き込んだ updated_at
+        """
+        changes = [change for change in changes if change[2] != change[3]]
+        if not changes:
+            return
+        if label is None:
+            label = changes[0][1] if len(changes) == 1 else f"{len(changes)} 件の一括変更"
+        if dates is None:
+            dates = self._record_dates({change[0] for change in changes})
+        self.undo_history.push(UndoOperation(label, changes, dates, versions))
+
+    def _record_dates(self, record_ids):
+        """行の取得日を表示中のデータとキャッシュから調べる（見つからない行は含まれない）"""
+        dates, missing = set(), set()
+        for record_id in record_ids:
+            row_data = self.cleaning_model.get_row_data(record_id)
+            if row_data is None:
+                missing.add(record_id)
+            else:
+                dates.add(row_data.get("acquisition_date"))
+        for acquisition_date, rows in self.snapshot_cache.recent(len(self.snapshot_cache)) if missing else ():
+            if any(row.get("id") in missing for row in rows):
+                dates.add(acquisition_date)
+        return dates
 
     @Slot()
     def perform_undo(self):
         """元に戻す操作（Ctrl+Z）"""
-        if self.undo_stack_pointer <= 0:
+        if self.offline:
+            self.status_label.setText("オフライン中は元に戻す操作を利用できません")
+            return
+        # 未反映の編集がある場合は書き込みと履歴への追加を済ませてから実行
+        if self.write_queue.pending_count():
+            self.write_queue.flush(on_finished=self.perform_undo)
+            return
+        if not self.undo_history.can_undo():
             self.status_label.setText("元に戻せる操作がありません")
             return
-        
-        # ポインタを前に移動
-        self.undo_stack_pointer -= 1
-        operation = self.operation_history[self.undo_stack_pointer]
-        
-        # 元の値に戻す
-        success = self.db_handler.update_record(
-            operation['record_id'], 
-            operation['column'], 
-            operation['old_value']
-        )
-        
-        if success:
-            # UIを更新
-            self.load_data_for_selected_date()
-            self.status_label.setText(f"操作を元に戻しました: {operation['column']}")
-        else:
-            self.status_label.setText("元に戻す操作に失敗しました")
-            # 失敗した場合はポインタを戻す
-            self.undo_stack_pointer += 1
+        operation = self.undo_history.undo()
+        self._apply_history_changes(operation, operation.undo_changes(), "元に戻しました")
 
     @Slot()
     def perform_redo(self):
         """やり直し操作（Ctrl+Y）"""
-        if self.undo_stack_pointer >= len(self.operation_history):
+        if self.offline:
+            self.status_label.setText("オフライン中はやり直し操作を利用できません")
+            return
+        if self.write_queue.pending_count():
+            self.write_queue.flush(on_finished=self.perform_redo)
+            return
+        if not self.undo_history.can_redo():
             self.status_label.setText("やり直せる操作がありません")
             return
-        
-        operation = self.operation_history[self.undo_stack_pointer]
-        
-        # 新しい値に戻す
-        success = self.db_handler.update_record(
-            operation['record_id'], 
-            operation['column'], 
-            operation['new_value']
-        )
-        
-        if success:
-            # ポインタを次に移動
-            self.undo_stack_pointer += 1
-            # UIを更新
-            self.load_data_for_selected_date()
-            self.status_label.setText(f"操作をやり直しました: {operation['column']}")
-        else:
-            self.status_label.setText("やり直し操作に失敗しました")
+        operation = self.undo_history.redo()
+        self._apply_history_changes(operation, operation.redo_changes(), "やり直しました")
 
-    def _adjust_table_height(self, table_view):
-        header_height = table_view.horizontalHeader().height()
-        rows_height = sum(table_view.rowHeight(i) for i in range(table_view.model().rowCount()))
-        grid_lines_height = (table_view.model().rowCount() - 1) * 1 if table_view.model().rowCount() > 0 else 0
-        total_height = header_height + rows_height + grid_lines_height + 2
-        table_view.setFixedHeight(total_height)
+    def _apply_history_changes(self, operation, changes, action):
+        """
+        元に戻す・やり直しの値を表示中の行に直接反映し、DBへは1つのトランザクションで非同期に書き込む
+        日付の全件の読み直しは行わない（表示していない日付はキャッシュを破棄するだけ）
+        """
+        self.change_tracker.note_local_edit()
+        patched = set()
+        for record_id, column, value, _ in changes:
+            row_data = self.cleaning_model.get_row_data(record_id)
+            if row_data is None:
+                continue
+            row_data[column] = value
+            patched.add(record_id)
+        if patched:
+            # 行データは各モデルと当日のキャッシュで共有しているため、各画面の該当行だけを描画し直す
+            self.refresh_scheduler.mark_dirty(rows=patched, views=['main', 'cleaning', 'search', 'unprocessed'])
+
+        selected_date = self.date_edit.date().toString("yyyy-MM-dd")
+        if len(patched) < len({change[0] for change in changes}):
+            # 表示中の日付以外の行を含む場合、その日付のキャッシュは古くなる（日付が不明な場合はすべて破棄）
+            other_dates = operation.dates - {selected_date}
+            if other_dates:
+                for acquisition_date in other_dates:
+                    self.snapshot_cache.invalidate(acquisition_date)
+            else:
+                self.snapshot_cache.invalidate()
+
+        dates_label = "、".join(sorted(date for date in operation.dates if date and date != selected_date))
+        suffix = f"（{dates_label} のデータ）" if dates_label else ""
+        self.status_label.setText(f"操作を{action}: {operation.label}{suffix}")
+
+        # 他端末で変更されていた行は上書きせずに確認する。書き込みに失敗した場合は他の編集と同様にジャーナルへ記録する
+        self._submit_checked_writes(changes, lambda result: self._on_history_written(operation, result),
+                                    versions=operation.versions)
+
+    def _on_history_written(self, operation, result):
+        # 表示していない行は、次に元に戻す・やり直す際の基準として書き込んだ updated_at を覚えておく
+        if result["updated_at"]:
+            for record_id, *_ in result["applied"]:
+                if self.cleaning_model.get_row_data(record_id) is None:
+                    operation.versions[record_id] = result["updated_at"]
+
+    def _row_version(self, record_id):
+        """表示中の行の updated_at（楽観的排他制御の基準。表示していない行はNone）"""
+        row_data = self.cleaning_model.get_row_data(record_id)
+        return row_data.get("updated_at") if row_data is not None else None
+
+    def _submit_checked_writes(self, changes, on_applied, versions=None):
+        """
+        行が画面に表示している updated_at のままの場合だけ書き込む（楽観的排他制御）
+        :param changes: (record_id, column, value, 書き込む前にあるはずの値) のリスト
+        :param on_applied: 書き込み後に update_records_checked の結果の辞書を受け取る関数
+        :param versions: 表示していない行の updated_at
+        """
+        def on_finished(result, error):
+            success, result = result if result is not None else (False, error)
+            if not success:
+                self.on_writes_failed(changes, result)
+                return
+            self._on_checked_written(result, changes, on_applied)
+
+        # 同じ行への書き込みが実行中の場合は、その完了後に基準の updated_at を取り直してから書き込む
+        self.write_queue.write(changes, on_finished, versions=versions)
+
+    def _on_checked_written(self, result, changes, on_applied):
+        """楽観的排他制御付きの書き込み結果を反映し、他端末で変更されていた行を解決する"""
+        if result["updated_at"]:
+            # 自端末で書き込んだ行は、次の書き込みの基準を書き込んだ updated_at にする
+            for record_id, *_ in result["applied"]:
+                row_data = self.cleaning_model.get_row_data(record_id)
+                if row_data is not None:
+                    row_data["updated_at"] = result["updated_at"]
+        on_applied(result)
+        if result["conflicts"]:
+            self._resolve_write_conflicts(result["conflicts"], changes, on_applied)
+
+    def _resolve_write_conflicts(self, conflicts, changes, on_applied):
+        """
+        他端末で変更されていた行を取り込み、この端末の値を書き直すかどうかを決める
+        同じセルが変更されていない場合（別のセルだけが変更された場合）は確認せずにこの端末の値を書き直す
+        :param conflicts: (書き込めなかった変更, 現在の行（削除されていた場合はNone）) のリスト
+        """
+        bases = {(record_id, column): base for record_id, column, _, base in changes}
+        current_rows = {}
+        rewrite, ask, removed = [], [], set()
+        for (record_id, column, value, _), current in conflicts:
+            if current is None:
+                removed.add(record_id)
+                continue
+            current_rows.setdefault(record_id, current.to_dict())
+            theirs = current.get(column)
+            if theirs == value:
+                continue
+            if theirs == bases.get((record_id, column)):
+                rewrite.append((record_id, column, value, theirs))
+            else:
+                ask.append((record_id, column, value, theirs, bases.get((record_id, column))))
+
+        keep_local = bool(ask) and self._ask_keep_local_values(ask)
+        if keep_local:
+            rewrite += [(record_id, column, value, theirs) for record_id, column, value, theirs, _ in ask]
+        # 他端末の行を取り込み、書き直すセルだけはこの端末の値にする
+        for record_id, column, value, _ in rewrite:
+            current_rows[record_id][column] = value
+        changed_ids, _ = self.cleaning_model.apply_row_updates(list(current_rows.values()))
+        if changed_ids:
+            self.refresh_scheduler.mark_dirty(rows=changed_ids, views=['main', 'search', 'unprocessed'])
+        if removed:
+            self.refresh_scheduler.mark_dirty(date=self.date_edit.date().toString("yyyy-MM-dd"), reload=True)
+
+        if rewrite:
+            versions = {record_id: row.get("updated_at") for record_id, row in current_rows.items()}
+            self._submit_checked_writes(rewrite, on_applied, versions=versions)
+        if ask and not keep_local:
+            self.status_label.setText(f"他の端末で変更されていた {len(ask)} 件のセルは、他の端末の値を残しました。")
+        elif removed:
+            self.status_label.setText(f"他の端末で削除されていた {len(removed)} 件の行は保存できませんでした。")
+
+    def _ask_keep_local_values(self, conflicts):
+        """
+        同じセルが他端末でも変更されていた場合に、どちらの値を残すかを確認する
+        :param conflicts: (record_id, column, この端末の値, 他端末の値, 編集前の値) のリスト
+        :return: この端末の値で上書きする場合True
+        """
+        headers = self.cleaning_model._display_headers
+        text = lambda value: "" if value is None else value
+        lines = [f"レコード {record_id} の {headers.get(column, column)}: 編集前「{text(base)}」"
+                 f"→ 他の端末「{text(theirs)}」/ この端末「{text(mine)}」"
+                 for record_id, column, mine, theirs, base in conflicts[:20]]
+        if len(conflicts) > 20:
+            lines.append(f"ほか {len(conflicts) - 20} 件")
+        box = QMessageBox(self)
+        box.setIcon(QMessageBox.Warning)
+        box.setWindowTitle("編集の競合")
+        box.setText("他の端末でも同じセルが変更されていました。どちらの値を残しますか？\n\n" + "\n".join(lines))
+        keep_button = box.addButton("この端末の値で上書き", QMessageBox.AcceptRole)
+        box.addButton("他の端末の値を残す", QMessageBox.RejectRole)
+        box.exec()
+        return box.clickedButton() is keep_button
 
     @Slot(QModelIndex)
     def handle_table_click(self, index):
@@ -504,7 +807,7 @@ class MainWindow(QMainWindow):
         col_name = model._headers[index.column()]
 
         # 洗浄指示管理ページでのクリック処理
-        if isinstance(model, CleaningInstructionTableModel):
+        if sender_view is self.cleaning_table_view:
             # 洗浄指示カラム以外がクリックされた場合、自動移動を無効化
             try:
                 cleaning_instruction_col = model._headers.index("cleaning_instruction")
@@ -522,7 +825,7 @@ class MainWindow(QMainWindow):
             # 編集可能なカラムの場合、編集開始
             if col_name in ["cleaning_instruction", "notes"]:
                 sender_view.edit(index)
-        elif isinstance(model, MainTableModel) and col_name == "notes":
+        elif isinstance(model, RowRangeProxyModel) and col_name == "notes":
             sender_view.edit(index)
 
     @Slot(int)
@@ -530,187 +833,733 @@ class MainWindow(QMainWindow):
         is_visible = (page_id == 0)
         self.unprocessed_widget.setVisible(is_visible)
 
-    @Slot()
-    def refresh_unprocessed_list_from_model(self):
-        self.load_data_for_selected_date()
+    @Slot(object)
+    def refresh_unprocessed_list_from_model(self, row_data):
+        # 編集された1行だけを未処理リストの索引に反映する（DBの再読み込みや全件の再集計は行わない）
+        self.refresh_scheduler.mark_dirty(rows=[row_data.get("id")], views=['unprocessed'])
 
-    def _refresh_unprocessed_only(self):
-        """未処理リストのみを軽量更新するメソッド"""
-        # スクロール位置を保存
-        scroll_positions = self._save_scroll_positions()
-        
+    def _other_model_views(self, model):
+        """編集されたモデル以外で、同じ行を描画し直す必要がある画面の名前"""
+        return [name for name, other in (('main', self.main_model), ('cleaning', self.cleaning_model)) if other is not model]
+
+    @Slot(object)
+    def run_scheduled_refresh(self, request):
+        """RefreshScheduler がまとめた画面更新を実行する"""
         selected_date = self.date_edit.date().toString("yyyy-MM-dd")
-        data, error = self.db_handler.get_data_by_date(selected_date)
-        
-        if not error and data:
-            # 未処理リストのみ更新（メインテーブルは更新しない）
-            self.manufacturing_unprocessed_model.load_data(data)
-            self.cleaning_unprocessed_model.load_data(data)
-            
-            # 未処理リストのテーブルサイズ調整
-            self._adjust_table_height(self.manufacturing_unprocessed_table_view)
-            self._adjust_table_height(self.cleaning_unprocessed_table_view)
-            self.manufacturing_unprocessed_table_view.resizeColumnsToContents()
-            self.cleaning_unprocessed_table_view.resizeColumnsToContents()
+        for date in request.reload_dates:
+            self.snapshot_cache.invalidate(date)
+        if selected_date in request.reload_dates:
+            # 全件の読み直しで行単位の更新も反映される（変わった行だけが再描画される）
+            self.load_data_for_selected_date()
+            return
 
-        # スクロール位置を復元
-        self._restore_scroll_positions(scroll_positions)
+        rows = request.rows
+        if rows.get('main'):
+            self.main_model.refresh_rows(rows['main'])
+        if rows.get('cleaning'):
+            self.cleaning_model.refresh_rows(rows['cleaning'])
+        if rows.get('search'):
+            for record_id in rows['search']:
+                row_data = self.cleaning_model.get_row_data(record_id)
+                if row_data is not None:
+                    self.search_index.update_row(row_data)
+            self.apply_search(show_status=False)
+        if rows.get('unprocessed'):
+            self._update_unprocessed_rows([row_data for row_data in map(self.cleaning_model.get_row_data, rows['unprocessed'])
+                                           if row_data is not None])
+        if request.layout:
+            self._adjust_table_layouts()
+
+    def _adjust_table_layouts(self):
+        """読み込み後のテーブルの高さと列幅の調整（変わらない場合はビューに設定し直さない）"""
+        # 未処理リストは列が伸縮するため高さだけを合わせる
+        self.table_layout.fit_height(self.manufacturing_unprocessed_table_view)
+        self.table_layout.fit_height(self.cleaning_unprocessed_table_view)
+
+        # 固定幅のカラム（備考など）以外の列幅を内容に合わせる
+        for view in (self.main_table_view_left, self.main_table_view_center, self.main_table_view_right):
+            self.table_layout.fit_columns(view)
+        self.table_layout.fit_columns(self.cleaning_table_view, self.cleaning_minimum_widths)
+
+    def _update_unprocessed_rows(self, rows):
+        for model, view in ((self.manufacturing_unprocessed_model, self.manufacturing_unprocessed_table_view),
+                            (self.cleaning_unprocessed_model, self.cleaning_unprocessed_table_view)):
+            row_count = model.rowCount()
+            for row_data in rows:
+                model.update_row(row_data)
+            if model.rowCount() != row_count:
+                self.table_layout.fit_height(view)
 
     @Slot()
     def connect_to_db_and_load_data(self):
-        if self.db_handler.connect():
+        if not self._stale_snapshot_date:
+            self.status_label.setText("データベースに接続中...")
+        self.db_worker.start()
+
+    def show_local_snapshot(self):
+        """ローカルに保存した前回のデータを、最新でないことを明示して表示する"""
+        selected_date = self.date_edit.date().toString("yyyy-MM-dd")
+        snapshot = self.local_snapshot.load(selected_date)
+        if snapshot is None:
+            return
+        data, saved_at = snapshot
+        # 保存データは最新か確認できていないため、キャッシュや差分検知の基準には使わない
+        self._on_day_data_loaded(selected_date, (data, None, None), None, from_cache=True, revalidated=False)
+        self._set_stale_snapshot(selected_date)
+        self.status_label.setText(f"前回保存したデータ（{saved_at}）を表示中です。最新のデータを確認しています...")
+
+    def _set_stale_snapshot(self, acquisition_date):
+        self._stale_snapshot_date = acquisition_date
+        self._update_window_title()
+
+    def _update_window_title(self):
+        title = "洗浄依頼管理App"
+        if self.offline:
+            title += "［オフライン］"
+        elif self._stale_snapshot_date:
+            title += "［前回保存データを表示中］"
+        self.setWindowTitle(title)
+
+    def enter_offline_mode(self, reason):
+        """共有DBに接続できない間、編集をローカルのジャーナルに記録するモードに切り替える"""
+        if not self.offline:
+            self.offline = True
+            self.change_tracker.stop()
+            self.reconnect_timer.start()
+            self._update_window_title()
+            print(f"Offline mode: {reason}")
+        self.reconnect_button.setVisible(True)
+        self.update_pending_writes_label(self.write_queue.pending_count())
+        self.status_label.setText("共有DBに接続できません。変更はこのPCに記録し、再接続後に反映します。")
+
+    @Slot()
+    def try_reconnect(self):
+        """共有DBへの再接続を試み、成功したらジャーナルを再適用する"""
+        if self._reconnecting:
+            return
+        self._reconnecting = True
+        self.db_worker.submit('reconnect', 'ping', callback=self._on_reconnect_checked)
+
+    def _on_reconnect_checked(self, reachable, error):
+        self._reconnecting = False
+        if not reachable:
+            return
+        self.check_schema()
+        changes = self.offline_journal.pending_changes()
+        if not changes:
+            self._leave_offline_mode()
+            return
+
+        self.status_label.setText(f"オフライン中の変更 {len(changes)} 件を共有DBに反映中...")
+        batch_size = self.config.get('offline', {}).get('replay_batch_size', 200)
+
+        def task(handler):
+            # 一定件数ごとに1トランザクションで適用し、失敗した時点で中断する
+            # 行は編集前の updated_at のままの場合だけ更新し、他端末で変更されていた行は競合として返す
+            replayed = []
+            for start in range(0, len(changes), batch_size):
+                batch = changes[start:start + batch_size]
+                success, result = handler.update_records_checked(
+                    [(record_id, column, value, base_updated_at)
+                     for _, record_id, column, value, _, base_updated_at in batch])
+                if not success:
+                    return replayed, result
+                replayed.append((batch, result))
+            return replayed, None
+
+        self.db_worker.submit('write', task, callback=self._on_journal_replayed)
+
+    def _on_journal_replayed(self, result, error):
+        replayed, error = result if result is not None else ([], error)
+        for batch, _ in replayed:
+            self.offline_journal.remove([seq for seqs, *_ in batch for seq in seqs])
+
+        if error:
+            self.status_label.setText(f"オフライン中の変更の反映に失敗しました: {error}")
+            return
+
+        # オフライン中に他端末でも変更されていた行は、通常の書き込みと同じく取り込んでから書き直すかどうかを決める
+        # （書き直しを先に積むことで、この後の読み込み直しには書き直した値が含まれる）
+        overwritten = []
+        for batch, result in replayed:
+            changes = [(record_id, column, value, base_value) for _, record_id, column, value, base_value, _ in batch]
+            base_values = {(record_id, column): base_value for record_id, column, _, base_value in changes}
+            for record_id, column, current_value, value in result["applied"]:
+                # updated_at 列が無いDBでは無条件に書き込むため、同じセルが変更されていた場合は報告する
+                if current_value != base_values.get((record_id, column)) and current_value != value:
+                    overwritten.append((record_id, column, current_value, value))
+            self._on_checked_written(result, changes, lambda result: None)
+        self._leave_offline_mode()
+        if overwritten:
+            lines = [f"レコード {record_id} の {column}: 他端末の値「{theirs}」→「{mine}」"
+                     for record_id, column, theirs, mine in overwritten[:20]]
+            if len(overwritten) > 20:
+                lines.append(f"ほか {len(overwritten) - 20} 件")
+            QMessageBox.warning(self, "競合の報告",
+                                "オフライン中に他の端末でも変更されていたセルを、このPCでの変更で上書きしました。\n\n"
+                                + "\n".join(lines))
+
+    def _append_to_journal(self, changes):
+        """編集をジャーナルに記録する（再適用時の競合の確認のため、表示中の行の updated_at も記録する）"""
+        return self.offline_journal.append(changes, versions={change[0]: self._row_version(change[0]) for change in changes})
+
+    def _leave_offline_mode(self):
+        was_offline = self.offline
+        self.offline = False
+        self.reconnect_timer.stop()
+        self.reconnect_button.setVisible(False)
+        self._update_window_title()
+        self.update_pending_writes_label(self.write_queue.pending_count())
+        if was_offline:
+            self.status_label.setText("共有DBに再接続しました。")
+        # 表示中の日付を読み込み直すと変更の検知も再開される
+        self.load_data_for_selected_date()
+
+    @Slot(str, object)
+    def on_change_token_updated(self, acquisition_date, token):
+        if self._stale_snapshot_date and acquisition_date == self._stale_snapshot_date:
+            self._set_stale_snapshot(None)
+            self.status_label.setText(f"{acquisition_date} のデータを最新の状態に更新しました。")
+
+    def _save_local_snapshot(self):
+        """表示中の日付と最近表示した日付のデータをローカルに保存する"""
+        selected_date = self.date_edit.date().toString("yyyy-MM-dd")
+        days = [(selected_date, self.cleaning_model.get_all_data())]
+        days += [day for day in self.snapshot_cache.recent(self.local_snapshot.max_dates) if day[0] != selected_date]
+        self.local_snapshot.save(days[:self.local_snapshot.max_dates])
+
+    @Slot(bool)
+    def on_db_connection_finished(self, success):
+        if success:
             self.status_label.setText("データベースに接続しました。")
-            self.load_data_for_selected_date()
+            self.check_schema()
+            if self.offline_journal.count():
+                # 前回終了時に未反映の変更が残っている場合は先に再適用する
+                self.enter_offline_mode("unsent journal entries")
+                self.try_reconnect()
+            else:
+                # 保存データを表示中の場合も全件を読み込み直し、id ごとの差分として表示に反映する
+                self.load_data_for_selected_date()
         else:
-            self.show_critical_error(f"データベース接続に失敗しました。\nパスを確認してください: {self.config['database']['path']}")
+            # 接続できない場合も起動は続け、保存データの表示と編集の記録を行う
+            self.enter_offline_mode("connection failed")
+            self.status_label.setText(
+                f"データベース接続に失敗しました。変更はこのPCに記録し、再接続後に反映します。"
+                f"（パス: {self.config['database']['path']}）"
+            )
+
+    def check_schema(self):
+        """接続後に一度だけスキーマの互換性を検査する（以降の読み込みより先に実行される）"""
+        if self._schema_checked:
+            return
+        self._schema_checked = True
+        self.db_worker.submit('schema', 'ensure_schema', callback=self._on_schema_checked)
+
+    def _on_schema_checked(self, result, error):
+        compatible, report = result if result is not None else (False, {"error": error})
+        if not compatible:
+            self.status_label.setText(f"DBスキーマの検査で問題が見つかりました: {report.get('error')}")
+            QMessageBox.warning(self, "DBスキーマの互換性",
+                                f"共有DBのスキーマがこのアプリと互換性がない可能性があります。\n\n詳細: {report.get('error')}")
+        elif report.get("error"):
+            print(report["error"])
+        elif report.get("created_indexes"):
+            self.status_label.setText(f"検索用インデックスを作成しました: {', '.join(report['created_indexes'])}")
 
-    def _save_scroll_positions(self):
-        """各テーブルビューのスクロール位置を保存"""
-        scroll_positions = {}
-        for view in self.all_table_views:
-            if hasattr(view, 'objectName'):
-                name = view.objectName()
-                if name:
-                    scroll_positions[name] = {
-                        'horizontal': view.horizontalScrollBar().value(),
-                        'vertical': view.verticalScrollBar().value()
-                    }
-        return scroll_positions
-
-    def _restore_scroll_positions(self, scroll_positions):
-        """保存したスクロール位置を復元"""
-        for view in self.all_table_views:
-            if hasattr(view, 'objectName'):
-                name = view.objectName()
-                if name and name in scroll_positions:
-                    pos = scroll_positions[name]
-                    view.horizontalScrollBar().setValue(pos['horizontal'])
-                    view.verticalScrollBar().setValue(pos['vertical'])
+    @Slot()
+    def show_db_diagnostics(self):
+        """主なクエリの実行計画を表示する"""
+        self.db_worker.submit('diagnostics', 'explain_queries', callback=self._on_db_diagnostics)
+
+    def _on_db_diagnostics(self, plans, error):
+        if error or not plans:
+            QMessageBox.warning(self, "DB診断", f"実行計画を取得できませんでした。\n\n詳細: {error or 'データベースに接続されていません。'}")
+            return
+        lines = []
+        full_scans = []
+        for label, query, details in plans:
+            lines.append(f"■ {label}\n{query}")
+            lines.extend(f"    {detail}" for detail in details)
+            lines.append("")
+            # インデックスを使わずテーブル全体を走査しているクエリ
+            if any(detail.startswith("SCAN") and "INDEX" not in detail for detail in details):
+                full_scans.append(label)
+
+        box = QMessageBox(self)
+        box.setWindowTitle("DB診断")
+        box.setIcon(QMessageBox.Warning if full_scans else QMessageBox.Information)
+        if full_scans:
+            box.setText(f"インデックスを使用していないクエリがあります: {', '.join(full_scans)}")
+        else:
+            box.setText("すべてのクエリでインデックスが使用されています。")
+        stats = self.refresh_scheduler.stats()
+        lines.append(f"■ 画面更新\n    要求 {stats['requested']} 回 / 実行 {stats['executed']} 回"
+                     f"（{stats['saved']} 回をまとめて省略）")
+        sync_stats = self.change_tracker.stats()
+        lines.append(f"■ 他端末の変更の確認\n    確認 {sync_stats['polls']} 回 / 変更あり {sync_stats['changes']} 回"
+                     f"（取得 {sync_stats['rows']} 行）\n"
+                     f"    現在の間隔 {sync_stats['interval_ms']} ms / 1回あたり {sync_stats['cost_ms']} ms")
+        box.setDetailedText("\n".join(lines))
+        box.exec()
+
+    @Slot(str, int)
+    def update_db_progress(self, kind, remaining):
+        """DBワーカーの処理状況をステータスバーに表示"""
+        if kind:
+            self.db_progress_label.setText(f"DB処理中: {kind}（待機 {remaining} 件）")
+        else:
+            self.db_progress_label.setText("" if remaining == 0 else f"DB待機中: {remaining} 件")
+        self.cancel_load_button.setVisible(self.db_worker.pending_count('load') > 0)
 
     @Slot()
-    def load_data_for_selected_date(self):
-        # スクロール位置を保存
-        scroll_positions = self._save_scroll_positions()
+    def cancel_pending_loads(self):
+        """実行中・待機中のデータ読み込みを中止する"""
+        cancelled = self.db_worker.cancel_kind('load')
+        if cancelled:
+            self.status_label.setText("データの読み込みを中止しました。")
+        self.cancel_load_button.setVisible(False)
+
+    def reload_selected_date(self):
+        """キャッシュを使わずに選択中の日付を読み直す"""
+        self.snapshot_cache.invalidate(self.date_edit.date().toString("yyyy-MM-dd"))
+        self.load_data_for_selected_date()
 
+    @Slot()
+    def load_data_for_selected_date(self):
         selected_date = self.date_edit.date().toString("yyyy-MM-dd")
+
+        cached = self.snapshot_cache.get(selected_date)
+        if cached is not None:
+            # キャッシュから即座に表示し、最新かどうかは裏で確認する（変更があれば差分を反映）
+            self.db_worker.cancel_kind('load')
+            token, data = cached
+            self._on_day_data_loaded(selected_date, (data, None, token), None, from_cache=True)
+            self.status_label.setText(f"{selected_date} のデータ {len(data)} 件をキャッシュから表示しました。")
+            self.change_tracker.poll()
+            return
+
+        if self._stale_snapshot_date and self._stale_snapshot_date != selected_date:
+            self._set_stale_snapshot(None)
+
         self.status_label.setText(f"{selected_date} のデータを読み込み中...")
 
-        data, error = self.db_handler.get_data_by_date(selected_date)
+        def task(handler):
+            # 読み込み前のトークンを基準にすることで、読み込み中のコミットも次回の確認で検知できる
+            token = handler.get_change_token()
+            data, error = handler.get_data_by_date(selected_date)
+            return data, error, token
+
+        # 古い日付の読み込みは不要なので中止してから新しい要求を積む
+        self.db_worker.cancel_kind('load')
+        self.db_worker.submit(
+            'load', task,
+            callback=lambda result, error: self._on_day_data_loaded(selected_date, result, error)
+        )
+        self.cancel_load_button.setVisible(True)
 
-        if error:
+    def _on_day_data_loaded(self, selected_date, result, error, from_cache=False, revalidated=True):
+        # 読み込み中に日付が変更された場合は結果を破棄
+        if selected_date != self.date_edit.date().toString("yyyy-MM-dd"):
+            return
+        token = None
+        if result is not None:
+            data, error, token = result
+
+        # モデルは id をキーに差分だけを反映するため、同じ日付の再読み込みでは選択状態やスクロール位置が維持される
+        if error and self.offline and self._stale_snapshot_date == selected_date:
+            # 接続できない間は、読み込み済みの保存データの表示を続ける
+            self.status_label.setText(f"共有DBに接続できないため、前回保存したデータを表示しています。（{error}）")
+        elif error:
             for model in self.all_models:
                 model.load_data([])
+            self.search_index.build([])
             self.status_label.setText(f"エラー: {error}")
-            QMessageBox.warning(self, "データベースエラー", f"データの読み込みに失敗しました。\n\n詳細: {error}")
+            if not self.offline:
+                QMessageBox.warning(self, "データベースエラー", f"データの読み込みに失敗しました。\n\n詳細: {error}")
         else:
-            self.main_models['left'].load_data(data[:20])
-            self.main_models['center'].load_data(data[20:40])
-            self.main_models['right'].load_data(data[40:])
+            self.main_model.load_data(data)
 
             # 洗浄指示管理ページは全データを一括表示
             self.cleaning_model.load_data(data)
+            if revalidated:
+                self.change_tracker.reset(selected_date, token, data)
+                self.snapshot_cache.put(selected_date, token, data)
+                self._prefetch_adjacent_dates(selected_date)
+            if not from_cache:
+                self._set_stale_snapshot(None)
+                self._save_local_snapshot()
 
             self.manufacturing_unprocessed_model.load_data(data)
             self.cleaning_unprocessed_model.load_data(data)
 
             self.status_label.setText(f"{selected_date} のデータ {len(data)} 件を読み込みました。")
 
-            self._adjust_table_height(self.main_table_view_left)
-            self._adjust_table_height(self.main_table_view_center)
-            self._adjust_table_height(self.main_table_view_right)
-            self._adjust_table_height(self.manufacturing_unprocessed_table_view)
-            self._adjust_table_height(self.cleaning_unprocessed_table_view)
+            # 検索語が入力されていれば新しいデータに対して絞り込み直す
+            self.search_index.build(data)
+            self.apply_search(show_status=False)
+            # 高さ・列幅の調整は続けて読み込んだ場合も1回にまとめる
+            self.refresh_scheduler.mark_dirty(layout=True)
 
-            self.manufacturing_unprocessed_table_view.resizeColumnsToContents()
-            self.cleaning_unprocessed_table_view.resizeColumnsToContents()
-            
-            # 洗浄指示管理ページのテーブル列幅を再調整
-            if hasattr(self, 'cleaning_table_view'):
-                # データ読み込み後に列幅を再設定
-                self.cleaning_table_view.resizeColumnsToContents()
-                
-                # 備考カラムのみ固定幅に再設定
-                try:
-                    notes_col_index = self.cleaning_model._headers.index("notes")
-                    self.cleaning_table_view.horizontalHeader().setSectionResizeMode(notes_col_index, QHeaderView.Fixed)
-                    self.cleaning_table_view.setColumnWidth(notes_col_index, 85)
-                except (ValueError, AttributeError):
-                    pass
+    @Slot()
+    def apply_search(self, text=None, show_status=True):
+        """検索語に一致する行だけを表示する（一致判定は索引で行い、入力のたびに全行を走査しない）"""
+        query = self.search_edit.text()
+        matches = self.search_index.search(query)
+        self.main_search_proxy.set_matches(matches)
+        self.cleaning_search_proxy.set_matches(matches)
+
+        self._update_main_pane_ranges(self.main_search_proxy.rowCount())
+        self.table_layout.fit_height(self.main_table_view_left)
+        self.table_layout.fit_height(self.main_table_view_center)
+        self.table_layout.fit_height(self.main_table_view_right)
+        if show_status:
+            if matches is None:
+                self.status_label.setText(f"検索を解除しました（{self.main_model.rowCount()} 件）。")
+            else:
+                self.status_label.setText(f"「{query}」に一致: {len(matches)} 件 / {self.main_model.rowCount()} 件")
+
+    def _update_main_pane_ranges(self, row_count):
+        """
+        Mainページの左・中央・右に表示する行範囲を設定する
+        pane_rows が指定されている場合は左・中央をその行数とし、残りを右に表示する。未指定の場合は3等分する
+        """
+        pane_rows = self.main_pane_rows or max(1, -(-row_count // 3))
+        self.main_proxies['left'].set_range(0, pane_rows)
+        self.main_proxies['center'].set_range(pane_rows, pane_rows)
+        self.main_proxies['right'].set_range(pane_rows * 2)
+
+    def _prefetch_adjacent_dates(self, selected_date):
+        """前後の日付をキャッシュに先読みする"""
+        self.db_worker.cancel_kind('prefetch')
+        base_date = QDate.fromString(selected_date, "yyyy-MM-dd")
+        for offset in (1, -1):
+            date_str = base_date.addDays(offset).toString("yyyy-MM-dd")
+            if date_str in self.snapshot_cache:
+                continue
 
-        # スクロール位置を復元
-        self._restore_scroll_positions(scroll_positions)
+            def task(handler, date_str=date_str):
+                token = handler.get_change_token()
+                data, error = handler.get_data_by_date(date_str)
+                return data, error, token
+
+            self.db_worker.submit(
+                'prefetch', task,
+                callback=lambda result, error, date_str=date_str: self._on_prefetched(date_str, result, error)
+            )
+
+    def _on_prefetched(self, date_str, result, error):
+        if error or result is None:
+            return
+        data, error, token = result
+        # 先読み中に同じ日付が表示用に読み込まれていれば、そちらを優先する
+        if error or date_str in self.snapshot_cache:
+            return
+        self.snapshot_cache.put(date_str, token, data)
+
+    @Slot(str, object, bool)
+    def apply_remote_changes(self, acquisition_date, rows, partial):
+        """他端末で変更された行だけを既存のモデルに反映する"""
+        if acquisition_date != self.date_edit.date().toString("yyyy-MM-dd"):
+            return
+
+        # 洗浄指示管理ページのモデルが当日の全行を保持しており、各モデルは同じ行データを共有している
+        changed_ids, unknown_ids = self.cleaning_model.apply_row_updates(rows)
+        removed = False
+        if not partial:
+            current_ids = {row.get("id") for row in self.cleaning_model.get_all_data()}
+            removed = bool(current_ids - {row.get("id") for row in rows})
+
+        if unknown_ids or removed:
+            # 行の追加・削除があった場合のみ全件を読み直す
+            self.refresh_scheduler.mark_dirty(date=acquisition_date, reload=True)
+            return
+        if not changed_ids:
+            return
+
+        # 洗浄指示管理ページのモデルは apply_row_updates で再描画済み
+        self.refresh_scheduler.mark_dirty(rows=changed_ids, views=['main', 'search', 'unprocessed'])
+        # 変わった行がわかるよう、しばらくの間だけ強調表示する
+        highlight_color = self.config.get('colors', {}).get('remote_change_highlight', '#FFF59D')
+        highlight_ms = self.config.get('sync', {}).get('highlight_ms', 2000)
+        for model in (self.main_model, self.cleaning_model):
+            model.highlight_rows(changed_ids, highlight_color, highlight_ms)
+        self.status_label.setText(f"他の端末の変更 {len(changed_ids)} 件を反映しました。")
 
     @Slot()
     def handle_copy_instructions(self):
+        if self.offline:
+            QMessageBox.warning(self, "オフライン", "共有DBに接続できないため、洗浄指示の複製は実行できません。")
+            return
         source_date = self.source_date_edit.date()
-        dest_date = self.destination_date_edit.date()
+        dest_start = self.destination_date_edit.date()
+        dest_end = self.destination_end_date_edit.date()
 
-        if source_date == dest_date:
-            QMessageBox.warning(self, "日付エラー", "コピー元とコピー先の日付が同じです。")
+        if dest_end < dest_start:
+            QMessageBox.warning(self, "日付エラー", "コピー先の終了日が開始日より前です。")
+            return
+        if dest_start.daysTo(dest_end) >= 31:
+            QMessageBox.warning(self, "日付エラー", "コピー先の期間は31日以内で指定してください。")
+            return
+        if dest_start <= source_date <= dest_end:
+            QMessageBox.warning(self, "日付エラー", "コピー先の期間にコピー元の日付が含まれています。")
             return
 
         source_date_str = source_date.toString("yyyy-MM-dd")
-        dest_date_str = dest_date.toString("yyyy-MM-dd")
+        dest_dates = [dest_start.addDays(offset).toString("yyyy-MM-dd") for offset in range(dest_start.daysTo(dest_end) + 1)]
+        dest_label = dest_dates[0] if len(dest_dates) == 1 else f"{dest_dates[0]} 〜 {dest_dates[-1]}（{len(dest_dates)}日分）"
 
         reply = QMessageBox.question(self, "実行確認",
                                      f"{source_date_str} の洗浄指示を、\n"
-                                     f"{dest_date_str} のデータに複製します。\n"
+                                     f"{dest_label} のデータに複製します。\n"
                                      f"（同じ機番の洗浄指示が上書きされます）\n\n"
                                      f"よろしいですか？",
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
 
         if reply == QMessageBox.Yes:
             self.status_label.setText("洗浄指示を複製中...")
-            QApplication.processEvents()
+            self.copy_instructions_button.setEnabled(False)
+            self.db_worker.submit(
+                'copy', 'copy_cleaning_instructions', source_date_str, dest_dates,
+                callback=lambda result, error: self._on_copy_instructions_finished(dest_dates, result, error)
+            )
 
-            success, result = self.db_handler.copy_cleaning_instructions(source_date_str, dest_date_str)
+    @Slot(int)
+    def apply_cleaning_sort_order(self, combo_index):
+        column = self.cleaning_sort_combo.itemData(combo_index)
+        header = self.cleaning_table_view.horizontalHeader()
+        if column is None:
+            header.setSortIndicator(-1, Qt.AscendingOrder)
+            self.cleaning_search_proxy.sort(-1)
+            return
+        try:
+            col_index = self.cleaning_model._headers.index(column)
+        except ValueError:
+            return
+        self.cleaning_table_view.sortByColumn(col_index, Qt.AscendingOrder)
 
-            if success:
-                QMessageBox.information(self, "成功", f"{result}件の洗浄指示を複製しました。")
-                self.status_label.setText(f"{result}件の洗浄指示を複製しました。")
-                if self.date_edit.date() == dest_date:
-                    self.load_data_for_selected_date()
-            else:
-                QMessageBox.critical(self, "エラー", f"処理に失敗しました。\n\n詳細: {result}")
-                self.status_label.setText(f"複製に失敗しました: {result}")
+    @Slot()
+    def show_date_range(self):
+        start_date = self.range_start_date_edit.date()
+        end_date = self.range_end_date_edit.date()
+        if end_date < start_date:
+            QMessageBox.warning(self, "日付エラー", "期間の終了日が開始日より前です。")
+            return
+        if self.offline:
+            QMessageBox.warning(self, "オフライン", "共有DBに接続できないため、期間表示は利用できません。")
+            return
+        # 最初のページはビューが canFetchMore/fetchMore で要求する
+        self.range_model.set_range(start_date.toString("yyyy-MM-dd"), end_date.toString("yyyy-MM-dd"))
+        self.cleaning_table_view.setVisible(False)
+        self.range_table_view.setVisible(True)
+        self.range_close_button.setEnabled(True)
+        self.status_label.setText("期間データを読み込み中...")
+
+    @Slot()
+    def close_date_range(self):
+        self.db_worker.cancel_kind('page')
+        self.range_model.clear()
+        self.range_table_view.setVisible(False)
+        self.cleaning_table_view.setVisible(True)
+        self.range_close_button.setEnabled(False)
+        self.status_label.setText("当日表示に戻りました。")
+
+    @Slot(int, bool)
+    def _on_range_page_loaded(self, loaded, exhausted):
+        if exhausted:
+            self.status_label.setText(f"期間データ {loaded} 件をすべて読み込みました。")
+        else:
+            self.status_label.setText(f"期間データ {loaded} 件を表示中（スクロールで続きを読み込みます）")
+        # 列幅は最初のページで決める（ページごとに全行を測り直さない）
+        if loaded <= self.range_model.page_size:
+            self.table_layout.fit_columns(self.range_table_view)
+
+    @Slot(str)
+    def _on_range_page_failed(self, error):
+        self.status_label.setText(f"期間データの読み込みに失敗しました: {error}")
+
+    @Slot(QDate)
+    def _on_destination_start_changed(self, date):
+        # 終了日が開始日より前にならないよう追従させる
+        if self.destination_end_date_edit.date() < date:
+            self.destination_end_date_edit.setDate(date)
+
+    def _on_copy_instructions_finished(self, dest_dates, result, error):
+        self.copy_instructions_button.setEnabled(True)
+        success, result = result if result is not None else (False, error)
 
-    @Slot(int, str, object)
-    def update_database_record(self, record_id, column, value):
-        # 現在の値を取得（履歴用）
-        old_value = self.db_handler.get_record_value(record_id, column)
-        
-        success = self.db_handler.update_record(record_id, column, value)
         if success:
-            # 履歴に追加（old_valueとvalueが異なる場合のみ）
-            if old_value != value:
-                self.add_to_history(record_id, column, old_value, value)
-            
-            self.status_label.setText(f"レコード {record_id} の {column} を更新しました。")
-            # データベース更新後の全データ再読み込みを軽量化
-            # チェックボックス系の更新では未処理リストのみを更新
-            if column in ["manufacturing_check", "cleaning_check"]:
-                # 未処理リストのみ非同期で更新（重い全データ再読み込みを回避）
-                QTimer.singleShot(50, self._refresh_unprocessed_only)
-            elif column in ["notes", "cleaning_instruction"]:
-                # 備考・洗浄指示更新時は再読み込み不要（すでにモデルに反映済み）
-                # 洗浄指示の場合は未処理リストのみ更新
-                if column == "cleaning_instruction":
-                    QTimer.singleShot(50, self._refresh_unprocessed_only)
-            else:
-                # その他のカラム更新時のみ全データ再読み込み
-                # スクロール位置を維持するために、現在のスクロール位置を保存
-                scroll_positions = self._save_scroll_positions()
+            applied = result["applied"]
+            QMessageBox.information(self, "成功", f"{len(applied)}件の洗浄指示を複製しました。")
+            self.status_label.setText(f"{len(applied)}件の洗浄指示を複製しました。")
+            # 複製はまとめて1回で元に戻せるよう1つの操作として履歴に追加
+            self.add_to_history(applied, label="洗浄指示の複製", dates=dest_dates,
+                                versions={change[0]: result["updated_at"] for change in applied})
+            for dest_date in dest_dates:
+                self.snapshot_cache.invalidate(dest_date)
+            if self.date_edit.date().toString("yyyy-MM-dd") in dest_dates:
                 self.load_data_for_selected_date()
-                # スクロール位置を復元
-                QTimer.singleShot(0, lambda: self._restore_scroll_positions(scroll_positions))
         else:
-            self.status_label.setText(f"レコード {record_id} の更新に失敗しました。")
-            # 失敗時は整合性のため全データ再読み込み
-            # スクロール位置を維持するために、現在のスクロール位置を保存
-            scroll_positions = self._save_scroll_positions()
-            self.load_data_for_selected_date()
-            # スクロール位置を復元
-            QTimer.singleShot(0, lambda: self._restore_scroll_positions(scroll_positions))
+            QMessageBox.critical(self, "エラー", f"処理に失敗しました。\n\n詳細: {result}")
+            self.status_label.setText(f"複製に失敗しました: {result}")
+
+    @Slot(int, str, object, object)
+    def update_database_record(self, record_id, column, value, old_value):
+        self.change_tracker.note_local_edit()
+        # 行データは各モデルで共有しているため、他のモデルの描画用の値も作り直す
+        self.refresh_scheduler.mark_dirty(rows=[record_id], views=self._other_model_views(self.sender()))
+        if self.offline:
+            # オフライン中はローカルのジャーナルに記録しておき、再接続後に反映する
+            self._append_to_journal([(record_id, column, value, old_value)])
+            self.update_pending_writes_label(self.write_queue.pending_count())
+            return
+        # 書き込みはキューに溜めて、まとめて1トランザクションで反映する
+        self.write_queue.enqueue(record_id, column, value, old_value)
+
+    @Slot(int)
+    def update_pending_writes_label(self, count):
+        texts = []
+        if count:
+            texts.append(f"未保存: {count} 件")
+        journal_count = self.offline_journal.count()
+        if journal_count:
+            texts.append(f"再接続待ち: {journal_count} 件")
+        self.pending_writes_label.setText("  ".join(texts))
+
+    @Slot(object)
+    def update_database_records(self, changes):
+        """
+        貼り付け・一括入力でまとめて変更したセルを1つのトランザクションで書き込む
+        :param changes: (record_id, column, value, old_value) のリスト
+        """
+        self.change_tracker.note_local_edit()
+        self.refresh_scheduler.mark_dirty(rows={change[0] for change in changes}, views=self._other_model_views(self.sender()))
+        self.refresh_scheduler.mark_dirty(rows={change[0] for change in changes if change[1] == "cleaning_instruction"},
+                                          views=['unprocessed'])
+        if self.offline:
+            self._append_to_journal(changes)
+            self.update_pending_writes_label(self.write_queue.pending_count())
+            return
+        # キューに残っている単独の編集を先に書き込み、同じセルを古い値で上書きしないようにする
+        self.write_queue.flush()
+        self.status_label.setText(f"{len(changes)} 件の変更を保存中...")
+        self._submit_checked_writes(changes, self._on_batch_written)
+
+    def _on_batch_written(self, result):
+        applied = result["applied"]
+        if not applied:
+            return
+        # 貼り付けなどで変更したセルは、まとめて1回で元に戻せるよう1つの操作として履歴に追加
+        self.add_to_history(applied)
+        self.status_label.setText(f"{len(applied)} 件の変更を保存しました。")
+
+    def _selected_cleaning_cells(self):
+        """洗浄指示管理ページで選択されているセルの (ビューの行, 列) のリスト（選択が無い場合は現在のセル）"""
+        cells = sorted({(index.row(), index.column()) for index in self.cleaning_table_view.selectionModel().selectedIndexes()})
+        if not cells:
+            current = self.cleaning_table_view.currentIndex()
+            if current.isValid():
+                cells = [(current.row(), current.column())]
+        return cells
+
+    def _apply_cleaning_cell_values(self, targets, action):
+        """
+        ビュー上のセルに値をまとめて入力する（入力できないカラムは無視し、洗浄指示に不正な値があれば何も変更しない）
+        :param targets: (ビューの行, 列, 値) のリスト
+        :param action: ステータス表示用の操作名
+        """
+        proxy = self.cleaning_search_proxy
+        headers = self.cleaning_model._headers
+        changes, invalid = [], []
+        for row, column, value in targets:
+            col_name = headers[column]
+            if col_name not in CleaningInstructionTableModel.EDITABLE_COLUMNS:
+                continue
+            value = unicodedata.normalize("NFKC", str(value)).strip()
+            if col_name == "cleaning_instruction" and value not in CLEANING_INSTRUCTION_VALUES:
+                invalid.append(f"{row + 1}行目: {value}")
+                continue
+            changes.append((proxy.mapToSource(proxy.index(row, column)).row(), col_name, value))
+
+        if invalid:
+            QMessageBox.warning(self, "入力エラー",
+                                "洗浄指示には 1〜4 または空欄のみ入力できます。\n\n" + "\n".join(invalid[:10]) +
+                                (f"\n…ほか {len(invalid) - 10} 件" if len(invalid) > 10 else ""))
+            return
+        applied = self.cleaning_model.set_values(changes)
+        if not applied:
+            self.status_label.setText(f"{action}: 変更されたセルはありません。")
+
+    @Slot()
+    def paste_into_cleaning_table(self):
+        text = QApplication.clipboard().text()
+        cells = self._selected_cleaning_cells()
+        if not text or not cells:
+            return
+        # Excelなどからコピーした表（行は改行、列はタブ区切り）
+        lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+        if lines[-1] == "":
+            lines.pop()
+        grid = [line.split("\t") for line in lines]
+        if len(grid) == 1 and len(grid[0]) == 1:
+            # 1つの値は選択したすべてのセルに入力する
+            targets = [(row, column, grid[0][0]) for row, column in cells]
+        else:
+            top = cells[0][0]
+            left = min(column for _, column in cells)
+            row_count, column_count = self.cleaning_search_proxy.rowCount(), self.cleaning_search_proxy.columnCount()
+            targets = [(top + i, left + j, value)
+                       for i, values in enumerate(grid) for j, value in enumerate(values)
+                       if top + i < row_count and left + j < column_count]
+        self._apply_cleaning_cell_values(targets, "貼り付け")
+
+    @Slot()
+    def fill_down_cleaning_table(self):
+        """選択範囲の各列の先頭のセルの値を、その下の選択したセルに入力する"""
+        cells = self._selected_cleaning_cells()
+        top_rows = {}
+        for row, column in cells:
+            top_rows.setdefault(column, row)
+        proxy = self.cleaning_search_proxy
+        targets = []
+        for row, column in cells:
+            if row != top_rows[column]:
+                value = proxy.index(top_rows[column], column).data(Qt.EditRole)
+                targets.append((row, column, "" if value is None else value))
+        self._apply_cleaning_cell_values(targets, "下方向へコピー")
+
+    @Slot()
+    def clear_cleaning_table_cells(self):
+        self._apply_cleaning_cell_values([(row, column, "") for row, column in self._selected_cleaning_cells()], "クリア")
+
+    @Slot(object, object)
+    def on_writes_failed(self, changes, error):
+        """書き込みに失敗した編集は捨てずにジャーナルへ記録し、再接続後に再適用する"""
+        self._append_to_journal(changes)
+        self.enter_offline_mode(error)
+
+    @Slot(object, object)
+    def on_writes_flushed(self, result, changes):
+        self._on_checked_written(result, changes, self._on_edits_written)
+
+    def _on_edits_written(self, result):
+        applied = result["applied"]
+        if not applied:
+            return
+        columns = set()
+        for record_id, column, old_value, value in applied:
+            # 単独の編集はセルごとに履歴に追加
+            self.add_to_history([(record_id, column, old_value, value)])
+            columns.add(column)
+
+        if len(applied) == 1:
+            record_id, column = applied[0][0], applied[0][1]
+            self.status_label.setText(f"レコード {record_id} の {column} を更新しました。")
+        else:
+            self.status_label.setText(f"{len(applied)} 件の変更を保存しました。")
+        # チェックボックス系・洗浄指示・備考は編集時にモデルと未処理リストへ反映済みなので再読み込み不要
+        if columns - {"manufacturing_check", "cleaning_check", "cleaning_instruction", "notes"}:
+            # その他のカラム更新時のみ全データ再読み込み（変わった行だけが再描画される）
+            self.refresh_scheduler.mark_dirty(date=self.date_edit.date().toString("yyyy-MM-dd"), reload=True)
 
     def show_critical_error(self, message):
         msg_box = QMessageBox()
@@ -719,9 +1568,49 @@ class MainWindow(QMainWindow):
         msg_box.setWindowTitle("エラー")
         msg_box.exec()
 
+    def changeEvent(self, event):
+        if event.type() == QEvent.ActivationChange:
+            # 背面にある間は他端末の変更の確認を減らす
+            self.change_tracker.set_foreground(self.isActiveWindow())
+        super().changeEvent(event)
+
     def closeEvent(self, event):
-        if self.db_handler:
-            self.db_handler.close()
+        if self._closing_after_worker and self.db_worker and self.db_worker.isRunning():
+            # 書き込みの完了待ちの間は閉じない（ワーカーの終了後に自動で閉じる）
+            event.ignore()
+            return
+        self.refresh_scheduler.cancel()
+        stats = self.refresh_scheduler.stats()
+        print(f"Refresh requests: {stats['requested']}, executed: {stats['executed']}, saved: {stats['saved']}")
+        if self.db_worker:
+            # 読み込み要求は破棄し、書き込み要求は処理し終えてから接続を閉じる
+            for kind in ('load', 'prefetch', 'page'):
+                self.db_worker.cancel_kind(kind)
+            self.change_tracker.stop()
+            self.db_worker.cancel_kind('poll')
+            # 未反映の編集を書き込んでから終了する
+            self.write_queue.flush()
+            stopped = self.db_worker.stop()
+            # 届いている書き込み結果を処理する（失敗した編集はここでジャーナルに記録される）
+            QCoreApplication.sendPostedEvents(self.db_worker)
+            # 結果を確認できなかった編集は、次回の起動時に再適用できるようジャーナルに記録する
+            # （書き込まれていた場合も、再適用時に同じ値として扱われる）
+            unconfirmed = self.write_queue.take_unconfirmed()
+            if unconfirmed:
+                self._append_to_journal(unconfirmed)
+                print(f"{len(unconfirmed)} unconfirmed edits saved to the offline journal.")
+            if not stopped:
+                # 実行中のスレッドを破棄すると異常終了するため、ウィンドウを残してワーカーの終了後に閉じ直す
+                print("Database worker did not finish pending writes in time; closing after it stops.")
+                if not self._closing_after_worker:
+                    self._closing_after_worker = True
+                    self.db_worker.finished.connect(self.close)
+                self.setEnabled(False)
+                self.status_label.setText("共有DBへの書き込みの完了を待っています。完了後に終了します...")
+                event.ignore()
+                return
+            self._save_local_snapshot()
+        self.offline_journal.close()
         super().closeEvent(event)
 
     def _generate_stylesheet(self):
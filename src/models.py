@@ -1,40 +1,102 @@
-from PySide6.QtCore import QAbstractTableModel, Qt, QModelIndex, Signal, QTimer
+from PySide6.QtCore import QAbstractTableModel, QSortFilterProxyModel, Qt, QModelIndex, QPersistentModelIndex, Signal, QTimer
 from PySide6.QtGui import QColor, QFont, QKeyEvent
 from PySide6.QtWidgets import QStyledItemDelegate, QComboBox, QLineEdit
+import bisect
 import datetime
 import collections
 
+from row_store import header_values
+
+# 洗浄指示として入力できる値（空欄は指示なし）
+CLEANING_INSTRUCTION_VALUES = ("", "1", "2", "3", "4")
+
+# 描画用の値と一緒に作成しておく並べ替え用のキー（並べ替えのたびに値を変換し直さない）
+SORT_KEY_ROLE = Qt.UserRole + 1
+
+# エディタのスタイル（エディタはプールして使い回すため、適用するのは作成時の1回だけ）
+COMBO_BOX_EDITOR_STYLE = """
+    QComboBox {
+        background-color: white;
+        color: black;
+        border: 1px solid #CED4DA;
+    }
+    QComboBox QAbstractItemView {
+        background-color: white;
+        color: black;
+        selection-background-color: #E9ECEF;
+        selection-color: #343A40;
+        border: 1px solid #CED4DA;
+    }
+    QComboBox QListView {
+        background-color: white;
+        color: black;
+    }
+"""
+
+LINE_EDIT_EDITOR_STYLE = """
+    QLineEdit {
+        background-color: white;
+        color: black;
+        border: 1px solid #CED4DA;
+        padding: 4px;
+    }
+"""
+
+class EditorPool:
+    """
+    デリゲートのエディタを親ウィジェット（ビューのviewport）ごとに使い回すためのプール
+    編集を終えたエディタは破棄せずに隠しておき、次のセルの編集で再利用する
+    """
+    def __init__(self, factory):
+        self._factory = factory  # factory(parent) -> 新しいエディタ
+        self._idle = {}  # 親ウィジェット -> 使用していないエディタ
+
+    def acquire(self, parent):
+        editor = self._idle.pop(parent, None)
+        if editor is None:
+            editor = self._factory(parent)
+            # 親ウィジェットと一緒に破棄された場合はプールから外す（接続は作成時の1回だけ）
+            editor.destroyed.connect(lambda *args, parent=parent: self._idle.pop(parent, None))
+        return editor
+
+    def release(self, editor, delegate=None):
+        """
+        エディタを隠してプールに戻す
+        :param delegate: 編集開始時にビューがエディタに設定したイベントフィルタ（次に使う際に設定し直されるため外しておく）
+        """
+        if delegate is not None:
+            editor.removeEventFilter(delegate)
+        editor.hide()
+        editor.clearFocus()
+        if self._idle.get(editor.parent()) not in (None, editor):
+            # 同じビューで同時に複数のエディタを開いた場合、プールには1つだけ残す
+            editor.deleteLater()
+            return
+        self._idle[editor.parent()] = editor
+
 class EditableComboBoxDelegate(QStyledItemDelegate):
     """編集可能なQComboBoxをテーブルセル内に表示するためのデリゲート"""
     def __init__(self, parent=None, items=None):
         super().__init__(parent)
         self.items = items or []
+        self._editor_pool = EditorPool(self._new_editor)
 
-    def createEditor(self, parent, option, index):
+    def _new_editor(self, parent):
         editor = QComboBox(parent)
         editor.addItems(self.items)
         editor.setEditable(True)
-        # Explicitly set stylesheet for the editor and its dropdown view
-        editor.setStyleSheet("""
-            QComboBox {
-                background-color: white;
-                color: black;
-                border: 1px solid #CED4DA;
-            }
-            QComboBox QAbstractItemView {
-                background-color: white;
-                color: black;
-                selection-background-color: #E9ECEF;
-                selection-color: #343A40;
-                border: 1px solid #CED4DA;
-            }
-            QComboBox QListView {
-                background-color: white;
-                color: black;
-            }
-        """)
+        # エディタは使い回すため、入力した値を選択肢に追加しない（他のセルの選択肢に残ってしまう）
+        editor.setInsertPolicy(QComboBox.NoInsert)
+        editor.setStyleSheet(COMBO_BOX_EDITOR_STYLE)
         return editor
 
+    def createEditor(self, parent, option, index):
+        return self._editor_pool.acquire(parent)
+
+    def destroyEditor(self, editor, index):
+        editor.hidePopup()
+        self._editor_pool.release(editor, self)
+
     def setEditorData(self, editor, index):
         value = index.model().data(index, Qt.EditRole)
         # Noneの場合は空文字列を設定、その他は文字列に変換
@@ -52,21 +114,23 @@ class CleaningInstructionDelegate(QStyledItemDelegate):
     def __init__(self, parent=None, table_view=None):
         super().__init__(parent)
         self.table_view = table_view
+        # 下のセルへ続けて入力する間は、同じエディタを行から行へ移して使う
+        self._editor_pool = EditorPool(self._new_editor)
+
+    def _new_editor(self, parent):
+        editor = QLineEdit(parent)
+        editor.setStyleSheet(LINE_EDIT_EDITOR_STYLE)
+        return editor
         
     def createEditor(self, parent, option, index):
-        editor = QLineEdit(parent)
-        editor.setStyleSheet("""
-            QLineEdit {
-                background-color: white;
-                color: black;
-                border: 1px solid #CED4DA;
-                padding: 4px;
-            }
-        """)
+        editor = self._editor_pool.acquire(parent)
         # 編集開始時に自動移動を有効化
         if self.table_view and hasattr(self.table_view, 'auto_move_enabled'):
             self.table_view.auto_move_enabled = True
         return editor
+
+    def destroyEditor(self, editor, index):
+        self._editor_pool.release(editor, self)
         
     def setEditorData(self, editor, index):
         value = index.model().data(index, Qt.EditRole)
@@ -76,7 +140,9 @@ class CleaningInstructionDelegate(QStyledItemDelegate):
     def setModelData(self, editor, model, index):
         text_value = editor.text().strip()
         # 入力値の検証（1-4の数値または空文字のみ許可）
-        if text_value == "" or text_value in ["1", "2", "3", "4"]:
+        if text_value in CLEANING_INSTRUCTION_VALUES:
+            # 並べ替え中は編集した行の位置が変わるため、移動先（編集前の次の行）を先に確保しておく
+            next_index = QPersistentModelIndex(model.index(index.row() + 1, index.column()))
             model.setData(index, text_value, Qt.EditRole)
             self.commitData.emit(editor)
             
@@ -90,7 +156,8 @@ class CleaningInstructionDelegate(QStyledItemDelegate):
                 try:
                     cleaning_instruction_col = model._headers.index("cleaning_instruction")
                     if index.column() == cleaning_instruction_col:
-                        QTimer.singleShot(50, lambda: self.table_view.move_to_next_cell(index))
+                        # 編集中のエディタが閉じられた直後（次のイベントループ）に次のセルの編集を開始する
+                        QTimer.singleShot(0, lambda: self.table_view.move_to_next_cell(index, QModelIndex(next_index)))
                 except (ValueError, AttributeError):
                     pass
                 
@@ -109,10 +176,49 @@ class CleaningInstructionDelegate(QStyledItemDelegate):
                 
         return super().eventFilter(editor, event)
 
+def natural_sort_key(machine_no):
+    """機番を数値順にソートするためのキー関数 (例: D-1, D-2, D-3, D-10)"""
+    try:
+        # ハイフンで分割して数値部分を取得
+        parts = machine_no.split('-')
+        if len(parts) >= 2:
+            prefix = parts[0]  # アルファベット部分 (D, A など)
+            number = int(parts[1])  # 数値部分
+            return (prefix, number)
+        else:
+            # ハイフンがない場合は文字列としてソート
+            return (machine_no, 0)
+    except (ValueError, IndexError):
+        # 数値変換に失敗した場合は文字列としてソート
+        return (machine_no, 0)
+
+def _contiguous_ranges(indexes):
+    """昇順の行番号のリストを連続する範囲 (最初, 最後) のリストにまとめる"""
+    ranges = []
+    for i in indexes:
+        if ranges and ranges[-1][1] == i - 1:
+            ranges[-1] = (ranges[-1][0], i)
+        else:
+            ranges.append((i, i))
+    return ranges
+
+def parse_date(value):
+    """DBの日付文字列（時刻付きも可）をdateに変換する（変換できない場合はNone）"""
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(str(value).split(' ')[0])
+    except (ValueError, TypeError):
+        return None
+
 class BaseTableModel(QAbstractTableModel):
     """モデルの共通ロジックを持つベースクラス"""
-    db_update_signal = Signal(int, str, object)
-    data_changed_for_unprocessed_list = Signal()
+    db_update_signal = Signal(int, str, object, object)  # record_id, カラム名, 新しい値, 編集前の値
+    data_changed_for_unprocessed_list = Signal(object)  # チェック・洗浄指示が変わった行のデータ
+
+    # 描画用のQColor/QFontは変更しないため、全モデルで共有する
+    _shared_colors = {}
+    _shared_bold_font = None
 
     def __init__(self, data=None, config=None, parent=None):
         super().__init__(parent)
@@ -120,6 +226,12 @@ class BaseTableModel(QAbstractTableModel):
         self._config = config or {}
         self._headers = []
         self._display_headers = {}
+        self._row_index = {}  # id -> 行番号
+        # 行ごとの描画用の値 {(列番号, ロール): 値}。data() は辞書を引くだけで済む
+        self._render_cache = []
+        self._highlighted = {}  # 強調表示中の行の id -> 強調表示を始めた世代
+        self._highlight_generation = 0
+        self._highlight_color = None
 
     def rowCount(self, parent=QModelIndex()):
         return len(self._data)
@@ -134,29 +246,164 @@ class BaseTableModel(QAbstractTableModel):
         return None
 
     def load_data(self, data, machine_number_filter=None):
-        self.beginResetModel()
         if machine_number_filter:
             # machine_number_filter が指定されている場合、その機番に一致するデータのみをフィルタリング
-            self._data = [row for row in data if row.get('machine_no') in machine_number_filter]
-        else:
-            # machine_number_filter が指定されていない場合、すべてのデータをロード
+            data = [row for row in data if row.get('machine_no') in machine_number_filter]
+        # machine_number_filter が指定されていない場合、すべてのデータをロード
+        if not self._apply_keyed_diff(data):
+            self.beginResetModel()
             self._data = data
-        self.endResetModel()
+            self._row_index = {row.get("id"): i for i, row in enumerate(self._data)}
+            self._render_cache = [self._build_render_row(row) for row in self._data]
+            self.endResetModel()
+
+    def _apply_keyed_diff(self, data):
+        """
+        現在の行と新しい行を id で突き合わせ、削除・挿入・値が変わった行だけをビューに通知する
+        選択状態や編集中のエディタ、スクロール位置はそのまま維持される
+        :return: 差分で反映できた場合True（idの重複や並び順の変化がある場合はFalse）
+        """
+        new_ids = [row.get("id") for row in data]
+        new_id_set = set(new_ids)
+        if len(new_id_set) != len(new_ids) or None in new_id_set:
+            return False
+        old_id_set = set(self._row_index)
+        # 残る行の並び順が変わっている場合は差分では表せない
+        if [row.get("id") for row in self._data if row.get("id") in new_id_set] != \
+                [record_id for record_id in new_ids if record_id in old_id_set]:
+            return False
+
+        # 行のリストはキャッシュや他のモデルと共有している場合があるため、作業用にコピーする
+        self._data = list(self._data)
+
+        # 1. 無くなった行を下から順に削除
+        removed = [i for i, row in enumerate(self._data) if row.get("id") not in new_id_set]
+        for first, last in reversed(_contiguous_ranges(removed)):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._data[first:last + 1]
+            del self._render_cache[first:last + 1]
+            self.endRemoveRows()
+
+        # 2. 新しい行を上から順に挿入（残った行の並び順は同じなので、挿入位置は新しい行の位置と一致する）
+        inserted = [i for i, record_id in enumerate(new_ids) if record_id not in old_id_set]
+        for first, last in _contiguous_ranges(inserted):
+            self.beginInsertRows(QModelIndex(), first, last)
+            self._data[first:first] = data[first:last + 1]
+            self._render_cache[first:first] = [self._build_render_row(row) for row in data[first:last + 1]]
+            self.endInsertRows()
+
+        # 3. 値が変わった行だけ再描画
+        inserted_set = set(inserted)
+        changed = [i for i, row in enumerate(data)
+                   if i not in inserted_set and self._data[i] is not row and self._data[i] != row]
+        self._data = data
+        self._row_index = {record_id: i for i, record_id in enumerate(new_ids)}
+        last_col = self.columnCount() - 1
+        for first, last in _contiguous_ranges(changed):
+            for i in range(first, last + 1):
+                self._render_cache[i] = self._build_render_row(data[i])
+            self.dataChanged.emit(self.index(first, 0), self.index(last, last_col))
+        return True
 
     def get_all_data(self):
         return self._data # Now returns the data currently loaded in the model
 
+    def get_row_data(self, record_id):
+        """指定したidの行データを返す（存在しない場合はNone）"""
+        row = self._row_index.get(record_id)
+        return self._data[row] if row is not None else None
+
+    def apply_row_updates(self, rows):
+        """
+        他端末で変更された行を id をキーに既存の行へ反映し、値が変わった行だけを再描画する
+        :param rows: DBから取得した行のリスト
+        :return: (値が変わった行のidの集合, モデルに存在しなかった行のidの集合)
+        """
+        changed_ids, unknown_ids = set(), set()
+        for new_row in rows:
+            record_id = new_row.get("id")
+            row = self._row_index.get(record_id)
+            if row is None:
+                unknown_ids.add(record_id)
+                continue
+            current = self._data[row]
+            if any(current.get(key) != value for key, value in new_row.items()):
+                current.update(new_row)
+                changed_ids.add(record_id)
+        self.refresh_rows(changed_ids)
+        return changed_ids, unknown_ids
+
+    def refresh_rows(self, record_ids):
+        """指定したidの行の描画用の値を作り直して再描画を通知する（行データは他のモデルと共有している）"""
+        last_col = self.columnCount() - 1
+        for record_id in record_ids:
+            row = self._row_index.get(record_id)
+            if row is not None:
+                render = self._build_render_row(self._data[row])
+                if record_id in self._highlighted:
+                    # 状態を表す背景色（洗浄指示の色など）がある列はそのまま残す
+                    for col in range(last_col + 1):
+                        render.setdefault((col, Qt.BackgroundRole), self._highlight_color)
+                self._render_cache[row] = render
+                self.dataChanged.emit(self.index(row, 0), self.index(row, last_col))
+
+    def highlight_rows(self, record_ids, color_hex, duration_ms):
+        """他端末で変更された行を一定時間だけ背景色で強調表示する"""
+        if not record_ids:
+            return
+        self._highlight_color = self._color(color_hex)
+        self._highlight_generation += 1
+        generation = self._highlight_generation
+        for record_id in record_ids:
+            self._highlighted[record_id] = generation
+        self.refresh_rows(record_ids)
+        QTimer.singleShot(duration_ms, lambda: self._end_highlight(generation))
+
+    def _end_highlight(self, generation):
+        # 後から強調表示し直した行は、その強調表示の終了時に戻す
+        expired = [record_id for record_id, started in self._highlighted.items() if started == generation]
+        for record_id in expired:
+            del self._highlighted[record_id]
+        self.refresh_rows(expired)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return None
+        return self._render_cache[index.row()].get((index.column(), role))
+
+    def _set_value(self, row, col_name, value):
+        """セルの値を書き換え、その行の描画用の値を作り直す"""
+        self._data[row][col_name] = value
+        self._render_cache[row] = self._build_render_row(self._data[row])
+
+    def _build_render_row(self, row_data):
+        """1行分の描画用の値 {(列番号, ロール): 値} を作成する（サブクラスで実装）"""
+        return {}
+
+    def _color(self, color_hex):
+        color = self._shared_colors.get(color_hex)
+        if color is None:
+            color = BaseTableModel._shared_colors[color_hex] = QColor(color_hex)
+        return color
+
+    def _bold_font(self):
+        if BaseTableModel._shared_bold_font is None:
+            font = QFont()
+            font.setBold(True)
+            BaseTableModel._shared_bold_font = font
+        return BaseTableModel._shared_bold_font
+
+    def _instruction_color(self, row_data):
+        """洗浄指示に対応する機番の背景色（指示が無い場合はNone）"""
+        color_hex = self._config.get("colors", {}).get(f"instruction_{row_data.get('cleaning_instruction', '')}")
+        return self._color(color_hex) if color_hex else None
+
     def _is_set_logically(self, row_data):
-        set_date_str = row_data.get("set_date")
-        acquisition_date_str = row_data.get("acquisition_date")
-        if not set_date_str or not acquisition_date_str: return False
-        try:
-            set_date = datetime.date.fromisoformat(str(set_date_str).split(' ')[0])
-            acquisition_date = datetime.date.fromisoformat(str(acquisition_date_str).split(' ')[0])
-            delta = datetime.timedelta(days=1)
-            logical_yesterday = acquisition_date - delta
-            return set_date == logical_yesterday
-        except (ValueError, TypeError): return False
+        """セット日が取得日の前日かどうか"""
+        set_date = parse_date(row_data.get("set_date"))
+        acquisition_date = parse_date(row_data.get("acquisition_date"))
+        if set_date is None or acquisition_date is None:
+            return False
+        return set_date == acquisition_date - datetime.timedelta(days=1)
 
 class MainTableModel(BaseTableModel):
     """Mainページ用のテーブルモデル"""
@@ -183,81 +430,43 @@ class MainTableModel(BaseTableModel):
             "notes": "備考",
         }
 
-    def _is_set_yesterday(self, row_data):
-        set_date_str = row_data.get("set_date")
-        acquisition_date_str = row_data.get("acquisition_date")
-        if not set_date_str or not acquisition_date_str:
-            return False
-        try:
-            set_date = datetime.date.fromisoformat(str(set_date_str).split(' ')[0])
-            acquisition_date = datetime.date.fromisoformat(str(acquisition_date_str).split(' ')[0])
-            yesterday = acquisition_date - datetime.timedelta(days=1)
-            return set_date == yesterday
-        except (ValueError, TypeError):
-            return False
-
-    def data(self, index, role=Qt.DisplayRole):
-        if not index.isValid(): return None
-        row_data = self._data[index.row()]
-        col_name = self._headers[index.column()]
-
-        if role == Qt.DisplayRole or role == Qt.EditRole:
-            if col_name in ["manufacturing_check", "cleaning_check", "previous_day_set"]:
-                return None
-            return row_data.get(col_name, "")
+    def _build_render_row(self, row_data):
+        render = {}
+        colors = self._config.get("colors", {})
+        cleaning_checked = bool(row_data.get("cleaning_check"))
+        set_yesterday = self._is_set_logically(row_data)
+        cleaning_bg = self._color("#B3C6E7")  # 薄い紺色（テキストが見やすい色）
 
-        if role == Qt.CheckStateRole:
+        for col, (col_name, value) in enumerate(zip(self._headers, header_values(row_data, self._headers))):
             if col_name in ["manufacturing_check", "cleaning_check", "previous_day_set"]:
                 # セットカラムの場合、カラーリング設定条件（セット日が昨日）でも自動的にTRUEに設定
-                if col_name == "previous_day_set":
-                    # データベース値をチェックし、カラーリング条件が満たされた場合は自動的にTRUE
-                    stored_value = bool(row_data.get(col_name))
-                    if self._is_set_yesterday(row_data):
-                        return Qt.Checked
-                    else:
-                        return Qt.Checked if stored_value else Qt.Unchecked
-                else:
-                    return Qt.Checked if bool(row_data.get(col_name)) else Qt.Unchecked
+                checked = bool(value) or (col_name == "previous_day_set" and set_yesterday)
+                render[(col, Qt.CheckStateRole)] = Qt.Checked if checked else Qt.Unchecked
+            else:
+                render[(col, Qt.DisplayRole)] = value
+                render[(col, Qt.EditRole)] = value
 
-        if role == Qt.FontRole:
             if col_name == 'machine_no':
-                font = QFont()
-                font.setBold(True)
-                return font
-
-        if role == Qt.ForegroundRole:
+                render[(col, Qt.FontRole)] = self._bold_font()
             # 備考カラムのテキスト色を赤に設定
             if col_name == 'notes':
-                return QColor(Qt.red)
+                render[(col, Qt.ForegroundRole)] = self._color("red")
 
-        if role == Qt.BackgroundRole:
             # 洗浄チェックがTRUEの場合、機番以外の背景色を薄い紺色に設定
-            if bool(row_data.get("cleaning_check")) and col_name != 'machine_no':
-                return QColor("#B3C6E7")  # 薄い紺色（テキストが見やすい色）
-            if col_name == 'machine_no':
-                instruction = str(row_data.get("cleaning_instruction", ""))
-                color_map = self._config.get("colors", {})
-                color_key = f"instruction_{instruction}"
-                if color_key in color_map:
-                    color = QColor(color_map[color_key])
-                    return color
-            
-            if col_name == 'previous_day_set':
-                if self._is_set_yesterday(row_data):
-                    completion_date_str = row_data.get("completion_date")
-                    acquisition_date_str = row_data.get("acquisition_date")
-                    colors = self._config.get("colors", {})
-                    try:
-                        acquisition_date = datetime.date.fromisoformat(str(acquisition_date_str).split(' ')[0])
-                        if completion_date_str:
-                            completion_date = datetime.date.fromisoformat(str(completion_date_str).split(' ')[0])
-                            if completion_date == acquisition_date:
-                                return QColor(colors.get("set_bg_today", "#0000FF"))  # 青
-                    except (ValueError, TypeError):
-                        pass
-                    return QColor(colors.get("set_bg_other_day", "#FFFF00"))  # 黄色
-
-        return None
+            background = None
+            if cleaning_checked and col_name != 'machine_no':
+                background = cleaning_bg
+            elif col_name == 'machine_no':
+                background = self._instruction_color(row_data)
+            elif col_name == 'previous_day_set' and set_yesterday:
+                acquisition_date = parse_date(row_data.get("acquisition_date"))
+                if parse_date(row_data.get("completion_date")) == acquisition_date:
+                    background = self._color(colors.get("set_bg_today", "#0000FF"))  # 青
+                else:
+                    background = self._color(colors.get("set_bg_other_day", "#FFFF00"))  # 黄色
+            if background is not None:
+                render[(col, Qt.BackgroundRole)] = background
+        return render
 
     def setData(self, index, value, role=Qt.EditRole):
         if not index.isValid(): return False
@@ -270,25 +479,28 @@ class MainTableModel(BaseTableModel):
             new_value = bool(value)
             
             # UI更新を即座に実行
-            self._data[row][col_name] = new_value
+            old_value = self._data[row].get(col_name)
+            self._set_value(row, col_name, new_value)
             self.dataChanged.emit(index, index, [role])
             
             # データベース更新を非同期で実行（次のイベントループで実行）
-            QTimer.singleShot(0, lambda: self.db_update_signal.emit(record_id, col_name, new_value))
+            QTimer.singleShot(0, lambda: self.db_update_signal.emit(record_id, col_name, new_value, old_value))
             
             # 未処理リスト更新も少し遅らせて実行（データベース更新の後に実行されるように）
             if col_name in ["manufacturing_check", "cleaning_check"]:
-                QTimer.singleShot(10, lambda: self.data_changed_for_unprocessed_list.emit())
+                row_data = self._data[row]
+                QTimer.singleShot(10, lambda: self.data_changed_for_unprocessed_list.emit(row_data))
             
             return True
 
         if role == Qt.EditRole and col_name == "notes":
             # 備考欄も同様に非同期化
-            self._data[row][col_name] = value
+            old_value = self._data[row].get(col_name)
+            self._set_value(row, col_name, value)
             self.dataChanged.emit(index, index, [role])
             
             # データベース更新を非同期で実行
-            QTimer.singleShot(0, lambda: self.db_update_signal.emit(record_id, col_name, value))
+            QTimer.singleShot(0, lambda: self.db_update_signal.emit(record_id, col_name, value, old_value))
             
             return True
 
@@ -304,10 +516,86 @@ class MainTableModel(BaseTableModel):
             return base_flags | Qt.ItemIsEditable
         return base_flags
 
+class RowRangeProxyModel(QSortFilterProxyModel):
+    """
+    ソースモデルの連続した行範囲だけを表示するプロキシ（Mainページの左・中央・右の表に使用）
+    編集・再描画・描画用の値の作成はソースモデルで1回だけ行われる
+    """
+    def __init__(self, source_model, first=0, count=None, parent=None):
+        super().__init__(parent)
+        self._first = first
+        self._count = count  # Noneの場合は最後の行まで
+        self.setSourceModel(source_model)
+        # 行の挿入・削除で後ろの行の位置がずれるため、範囲に含まれる行を評価し直す
+        source_model.rowsInserted.connect(self._on_source_rows_shifted)
+        source_model.rowsRemoved.connect(self._on_source_rows_shifted)
+        source_model.layoutChanged.connect(self._on_source_rows_shifted)
+
+    @property
+    def _headers(self):
+        return self.sourceModel()._headers
+
+    def set_range(self, first, count=None):
+        if (first, count) != (self._first, self._count):
+            self._first, self._count = first, count
+            self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if source_row < self._first:
+            return False
+        return self._count is None or source_row < self._first + self._count
+
+    def _on_source_rows_shifted(self, *args):
+        self.invalidateFilter()
+
+class SearchFilterProxyModel(QSortFilterProxyModel):
+    """
+    文字検索に一致した行だけを表示するプロキシ
+    一致判定は SearchIndex で行い、ここでは一致した id の集合に含まれるかどうかだけを確認する
+    """
+    def __init__(self, source_model, parent=None):
+        super().__init__(parent)
+        self._matches = None  # Noneの場合は絞り込みなし
+        self.setSourceModel(source_model)
+
+    @property
+    def _headers(self):
+        return self.sourceModel()._headers
+
+    def set_matches(self, record_ids):
+        """表示する行の id の集合を設定する（Noneで絞り込みを解除）"""
+        if record_ids is None and self._matches is None:
+            return
+        self._matches = record_ids
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._matches is None:
+            return True
+        return self.sourceModel().get_all_data()[source_row].get("id") in self._matches
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # 並べ替えはソースモデルの行の並びで行う（プロキシの lessThan を行の比較ごとに呼ばない）
+        self.sourceModel().sort(column, order)
+
 class CleaningInstructionTableModel(BaseTableModel):
-    """洗浄指示管理ページ用のテーブルモデル"""
+    """
+    洗浄指示管理ページ用のテーブルモデル
+    並べ替え（ライン・洗浄指示・セット予定日ごとのまとまり）は行の並び自体を入れ替えて行う
+    並べ替え用のキーは描画用の値と一緒に作成しておき、セルの編集後はその行だけを移動する
+    """
+    # 貼り付け・一括入力で変更されたセル (record_id, カラム名, 新しい値, 編集前の値) のリスト
+    db_batch_update_signal = Signal(object)
+    EDITABLE_COLUMNS = ("cleaning_instruction", "notes")
+
     def __init__(self, data=None, config=None, parent=None):
         super().__init__(data, config, parent)
+        self._sort_column = -1  # -1 の場合は読み込んだ順（DBの並び順）
+        self._sort_order = Qt.AscendingOrder
+        self._load_order = {}  # id -> 読み込んだ順
+        # 洗浄指示の優先順（並べ替え用。含まれない指示・空欄は最後）
+        priority = self._config.get("cleaning_page", {}).get("instruction_priority", ["1", "2", "3", "4"])
+        self._instruction_rank = {str(instruction): rank for rank, instruction in enumerate(priority)}
         self._headers = [
             "set_date", "machine_no", "customer_name", "part_number", 
             "product_name", "next_process", "quantity", "completion_date", "material_id", "cleaning_instruction", "notes"
@@ -326,46 +614,166 @@ class CleaningInstructionTableModel(BaseTableModel):
             "notes": "備考",
         }
 
-    def data(self, index, role=Qt.DisplayRole):
-        if not index.isValid(): return None
-        row_data = self._data[index.row()]
-        col_name = self._headers[index.column()]
+    def _build_render_row(self, row_data):
+        render = {}
+        colors = self._config.get("colors", {})
+        is_set = self._is_set_logically(row_data)
+        machine_key = natural_sort_key(str(row_data.get("machine_no") or ""))
+        record_id = row_data.get("id") or 0
 
-        if role == Qt.DisplayRole or role == Qt.EditRole:
-            value = row_data.get(col_name, "")
-            if col_name == "cleaning_instruction" and str(value) == "0":
-                return ""
-            if col_name in ["set_date", "completion_date"] and value:
-                return str(value).split(' ')[0]
-            return value
+        for col, (col_name, value) in enumerate(zip(self._headers, header_values(row_data, self._headers))):
+            value = self._display_value(col_name, value)
+            render[(col, Qt.DisplayRole)] = value
+            render[(col, Qt.EditRole)] = value
+            render[(col, SORT_KEY_ROLE)] = self._sort_key(col_name, value, machine_key, record_id)
 
-        if role == Qt.FontRole:
             if col_name == 'machine_no':
-                font = QFont()
-                font.setBold(True)
-                return font
-        
-        if role == Qt.BackgroundRole:
+                render[(col, Qt.FontRole)] = self._bold_font()
+
+            background = None
             # 優先度1: 機番の背景色（洗浄指示）
             if col_name == 'machine_no':
-                instruction = str(row_data.get("cleaning_instruction", ""))
-                color_map = self._config.get("colors", {})
-                color_key = f"instruction_{instruction}"
-                if color_key in color_map:
-                    color = QColor(color_map[color_key])
-                    return color
-
+                background = self._instruction_color(row_data)
             # 優先度2: 材質識別の背景色
-            if col_name == 'material_id' and str(row_data.get('material_id')) == '5':
-                color_hex = self._config.get("colors", {}).get("material_id_background_yellow", "#FFD54F")
-                return QColor(color_hex)
-
+            if background is None and col_name == 'material_id' and str(row_data.get('material_id')) == '5':
+                background = self._color(colors.get("material_id_background_yellow", "#FFD54F"))
             # 優先度3: セット項目の背景色
-            if self._is_set_logically(row_data) and col_name != 'cleaning_instruction':
-                color_hex = self._config.get("colors", {}).get("set_background_green", "#81C784")
-                return QColor(color_hex)
+            if background is None and is_set and col_name != 'cleaning_instruction':
+                background = self._color(colors.get("set_background_green", "#81C784"))
+            if background is not None:
+                render[(col, Qt.BackgroundRole)] = background
+        return render
 
-        return None
+    def _display_value(self, col_name, value):
+        if col_name == "cleaning_instruction" and str(value) == "0":
+            return ""
+        if col_name in ["set_date", "completion_date"] and value:
+            return str(value).split(' ')[0]
+        return value
+
+    def _sort_key(self, col_name, value, machine_key, record_id):
+        """
+        並べ替え用のキー。同じ値の行は機番の数値順（同じ機番はid順）に並べる
+        空欄はどのカラムでも最後にする
+        """
+        if col_name == "machine_no":
+            return (machine_key, record_id)
+        if col_name == "cleaning_instruction":
+            primary = self._instruction_rank.get(str(value), len(self._instruction_rank))
+        elif value is None or value == "":
+            primary = (1,)
+        elif col_name == "quantity":
+            try:
+                primary = (0, float(value), "")
+            except (TypeError, ValueError):
+                primary = (0, float("inf"), str(value))
+        else:
+            primary = (0, str(value).casefold())
+        return (primary, machine_key, record_id)
+
+    def _row_sort_key(self, row):
+        """行番号の並べ替え用のキー（読み込んだ順の場合はその順番）"""
+        if self._sort_column < 0:
+            return self._load_order.get(self._data[row].get("id"), len(self._load_order))
+        return self._render_cache[row][(self._sort_column, SORT_KEY_ROLE)]
+
+    def load_data(self, data, machine_number_filter=None):
+        self._load_order = {row.get("id"): i for i, row in enumerate(data)}
+        if self._sort_column >= 0:
+            # 並べ替え中は新しい行も同じ順に並べてから差分を反映する（値の変わらない行は移動しない）
+            col_name = self._headers[self._sort_column]
+            def row_key(row):
+                return self._sort_key(col_name, self._display_value(col_name, row.get(col_name)),
+                                      natural_sort_key(str(row.get("machine_no") or "")), row.get("id") or 0)
+            data = sorted(data, key=row_key, reverse=self._sort_order == Qt.DescendingOrder)
+        super().load_data(data, machine_number_filter)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """キャッシュ済みのキーで行を並べ替える（column が -1 の場合は読み込んだ順に戻す）"""
+        self._sort_column = column if 0 <= column < len(self._headers) else -1
+        self._sort_order = order
+        reverse = order == Qt.DescendingOrder and self._sort_column >= 0
+        new_order = sorted(range(len(self._data)), key=self._row_sort_key, reverse=reverse)
+        if new_order == list(range(len(self._data))):
+            return
+
+        self.layoutAboutToBeChanged.emit()
+        new_position = {old_row: new_row for new_row, old_row in enumerate(new_order)}
+        old_indexes = self.persistentIndexList()
+        self.changePersistentIndexList(
+            old_indexes, [self.index(new_position[index.row()], index.column()) for index in old_indexes]
+        )
+        self._data = [self._data[old_row] for old_row in new_order]
+        self._render_cache = [self._render_cache[old_row] for old_row in new_order]
+        self._row_index = {row.get("id"): i for i, row in enumerate(self._data)}
+        self.layoutChanged.emit()
+
+    def refresh_rows(self, record_ids):
+        super().refresh_rows(record_ids)
+        for record_id in record_ids:
+            row = self._row_index.get(record_id)
+            if row is not None:
+                self._reposition_row(row)
+
+    def _reposition_row(self, row):
+        """値が変わった1行だけを並べ替え後の位置へ移動する（他の行は並べ替え済みのまま）"""
+        if self._sort_column < 0:
+            return
+        key = self._row_sort_key(row)
+        descending = self._sort_order == Qt.DescendingOrder
+        # 移動する行を除いた並びの中で二分探索する
+        lo, hi = 0, len(self._data) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_key = self._row_sort_key(mid if mid < row else mid + 1)
+            if (mid_key < key) if descending else (key < mid_key):
+                hi = mid
+            else:
+                lo = mid + 1
+        if lo == row:
+            return
+
+        # beginMoveRows の移動先は移動前の行番号で指定する
+        self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), lo if lo < row else lo + 1)
+        self._data.insert(lo, self._data.pop(row))
+        self._render_cache.insert(lo, self._render_cache.pop(row))
+        for i in range(min(row, lo), max(row, lo) + 1):
+            self._row_index[self._data[i].get("id")] = i
+        self.endMoveRows()
+
+    def set_values(self, changes):
+        """
+        複数のセルの値をまとめて書き換える（貼り付け・一括入力・一括クリア）
+        再描画の通知は連続した行ごとに1回、DBへの反映要求は db_batch_update_signal で1回だけ行う
+        :param changes: (行番号, カラム名, 値) のリスト
+        :return: 値が変わったセルの (record_id, カラム名, 新しい値, 編集前の値) のリスト
+        """
+        applied = []
+        changed_rows = set()
+        for row, col_name, value in changes:
+            row_data = self._data[row]
+            record_id = row_data.get("id")
+            old_value = row_data.get(col_name)
+            if record_id is None or col_name not in self.EDITABLE_COLUMNS:
+                continue
+            if str(old_value if old_value is not None else "") == str(value):
+                continue
+            row_data[col_name] = value
+            changed_rows.add(row)
+            applied.append((record_id, col_name, value, old_value))
+        if not applied:
+            return applied
+
+        last_col = self.columnCount() - 1
+        for first, last in _contiguous_ranges(sorted(changed_rows)):
+            for row in range(first, last + 1):
+                self._render_cache[row] = self._build_render_row(self._data[row])
+            self.dataChanged.emit(self.index(first, 0), self.index(last, last_col))
+        if self._sort_column >= 0:
+            # 複数の行が移動するため、1行ずつではなくまとめて並べ替え直す
+            self.sort(self._sort_column, self._sort_order)
+        self.db_batch_update_signal.emit(applied)
+        return applied
 
     def setData(self, index, value, role=Qt.EditRole):
         if not index.isValid() or role != Qt.EditRole: return False
@@ -374,18 +782,21 @@ class CleaningInstructionTableModel(BaseTableModel):
         record_id = self._data[row].get("id")
         if record_id is None: return False
 
-        if col_name in ["cleaning_instruction", "notes"]:
+        if col_name in self.EDITABLE_COLUMNS:
             # UI更新を即座に実行
-            self._data[row][col_name] = value
+            old_value = self._data[row].get(col_name)
+            self._set_value(row, col_name, value)
             self.dataChanged.emit(index, index, [role])
             
             # データベース更新を非同期で実行（次のイベントループで実行）
-            QTimer.singleShot(0, lambda: self.db_update_signal.emit(record_id, col_name, value))
+            QTimer.singleShot(0, lambda: self.db_update_signal.emit(record_id, col_name, value, old_value))
             
             # 洗浄指示更新時は未処理リスト更新も少し遅らせて実行
             if col_name == "cleaning_instruction":
-                QTimer.singleShot(10, lambda: self.data_changed_for_unprocessed_list.emit())
-            
+                row_data = self._data[row]
+                QTimer.singleShot(10, lambda: self.data_changed_for_unprocessed_list.emit(row_data))
+
+            self._reposition_row(row)
             return True
         return False
 
@@ -393,60 +804,210 @@ class CleaningInstructionTableModel(BaseTableModel):
         base_flags = Qt.ItemIsSelectable | Qt.ItemIsEnabled
         if not index.isValid(): return base_flags
         col_name = self._headers[index.column()]
-        if col_name in ["cleaning_instruction", "notes"]:
+        if col_name in self.EDITABLE_COLUMNS:
             return base_flags | Qt.ItemIsEditable
         return base_flags
 
+class PagedRangeTableModel(CleaningInstructionTableModel):
+    """
+    複数日（1か月など）の洗浄指示を確認するための参照専用モデル
+    ビューのスクロールに合わせて canFetchMore/fetchMore でDBワーカーから1ページずつ読み込む
+    """
+    page_loaded = Signal(int, bool)  # 読み込み済みの行数, すべて読み込んだかどうか
+    page_failed = Signal(str)
+
+    def __init__(self, db_worker, config=None, page_size=200, parent=None):
+        super().__init__(config=config, parent=parent)
+        self.db_worker = db_worker
+        self.page_size = page_size
+        self._headers = ["acquisition_date"] + self._headers
+        self._display_headers["acquisition_date"] = "取得日"
+        self._range = None
+        self._after = None  # 最後に読み込んだ行の (取得日, id)
+        self._exhausted = True
+        self._fetching = False
+        self._generation = 0
+
+    def set_range(self, start_date, end_date):
+        """表示する期間を設定し、読み込み済みの行を破棄する（最初のページはビューの要求で読み込まれる）"""
+        self._generation += 1
+        self.beginResetModel()
+        self._data = []
+        self._row_index = {}
+        self._render_cache = []
+        self._range = (start_date, end_date)
+        self._after = None
+        self._exhausted = False
+        self._fetching = False
+        self.endResetModel()
+
+    def clear(self):
+        self.set_range(None, None)
+        self._range = None
+        self._exhausted = True
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return not self._exhausted and not self._fetching
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self.canFetchMore():
+            return
+        self._fetching = True
+        generation = self._generation
+        start_date, end_date = self._range
+        self.db_worker.submit(
+            'page', 'get_rows_page', start_date, end_date, self._after, self.page_size,
+            callback=lambda result, error: self._on_page_loaded(generation, result, error)
+        )
+
+    def _on_page_loaded(self, generation, result, error):
+        # 読み込み中に期間が変更された場合は破棄する
+        if generation != self._generation:
+            return
+        self._fetching = False
+        rows, error = result if result is not None else (None, error)
+        if error:
+            self._exhausted = True
+            self.page_failed.emit(error)
+            return
+
+        if rows:
+            first = len(self._data)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self._data.extend(rows)
+            for i, row in enumerate(rows, first):
+                self._row_index[row.get("id")] = i
+            self._render_cache.extend(self._build_render_row(row) for row in rows)
+            self.endInsertRows()
+            last = rows[-1]
+            self._after = (last.get("acquisition_date"), last.get("id"))
+        if len(rows) < self.page_size:
+            self._exhausted = True
+        self.page_loaded.emit(len(self._data), self._exhausted)
+
+    def setData(self, index, value, role=Qt.EditRole):
+        return False
+
+    def flags(self, index):
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled
+
 class UnprocessedMachineNumbersTableModel(QAbstractTableModel):
     """未払い出し機番を表示するためのモデル"""
     def __init__(self, check_column, config=None, parent=None):
         super().__init__(parent)
         self._all_data = []
+        # ラインごとに (ソートキー, record_id, 機番) を昇順に保持する
         self._filtered_data = collections.defaultdict(list)
+        self._entries = {}  # record_id -> 未処理リストに含まれているエントリ
+        self._row_count = 0  # ビューに通知済みの行数（各ラインの最大の長さ）
         self._config = config or {}
         self._check_column = check_column # 'manufacturing_check' or 'cleaning_check'
         self._headers = [chr(ord('A') + i) + ' line' for i in range(6)] # A line, B line, ... F line
 
+    def _make_entry(self, item):
+        """
+        未処理リストに表示する行であればエントリを返す（対象外の場合はNone）
+        フィルタリングロジック: 指定されたチェックカラムがFalse、かつ洗浄指示が"0"または"空欄"以外であるものを抽出
+        """
+        if item.get(self._check_column, False) or str(item.get('cleaning_instruction', '0')) in ['0', '']:
+            return None
+        machine_no = item.get('machine_no')
+        if not machine_no:
+            return None
+        # 同じ機番の行は読み込み順（id順）に並べる
+        return (natural_sort_key(machine_no), item.get('id'), machine_no)
+
     def load_data(self, new_data):
-        self.beginResetModel()
         self._all_data = new_data
+        old_filtered = self._filtered_data
         self._filtered_data = collections.defaultdict(list)
-        
+        self._entries = {}
+
         for item in self._all_data:
-            # フィルタリングロジック: 指定されたチェックカラムがFalse、かつ洗浄指示が"0"または"空欄"以外であるものを抽出
-            if not item.get(self._check_column, False) and str(item.get('cleaning_instruction', '0')) not in ['0', '']:
-                machine_no = item.get('machine_no')
-                if machine_no and len(machine_no) > 0:
-                    line_char = machine_no[0]
-                    self._filtered_data[line_char].append(machine_no)
-        
+            entry = self._make_entry(item)
+            if entry is not None:
+                self._entries[item.get('id')] = entry
+                self._filtered_data[entry[2][0]].append(entry)
+
         # 各ラインの機番をソート（数値順）
-        def natural_sort_key(machine_no):
-            """機番を数値順にソートするためのキー関数 (例: D-1, D-2, D-3, D-10)"""
-            try:
-                # ハイフンで分割して数値部分を取得
-                parts = machine_no.split('-')
-                if len(parts) >= 2:
-                    prefix = parts[0]  # アルファベット部分 (D, A など)
-                    number = int(parts[1])  # 数値部分
-                    return (prefix, number)
-                else:
-                    # ハイフンがない場合は文字列としてソート
-                    return (machine_no, 0)
-            except (ValueError, IndexError):
-                # 数値変換に失敗した場合は文字列としてソート
-                return (machine_no, 0)
-        
         for line_char in self._filtered_data:
-            self._filtered_data[line_char].sort(key=natural_sort_key)
+            self._filtered_data[line_char].sort()
 
-        self.endResetModel()
+        self._notify_changes(old_filtered)
+
+    def update_row(self, item):
+        """
+        1行分のチェック・洗浄指示の変更を反映する
+        該当ラインの位置を二分探索で求めて追加・削除し、変わったセルだけを再描画する
+        """
+        record_id = item.get('id')
+        old_entry = self._entries.get(record_id)
+        new_entry = self._make_entry(item)
+        if old_entry == new_entry:
+            return
+
+        changed = []  # (ライン, 最初に変わった位置, 変更前後の長い方の長さ)
+        if old_entry is not None:
+            entries = self._filtered_data[old_entry[2][0]]
+            position = bisect.bisect_left(entries, old_entry)
+            del entries[position]
+            del self._entries[record_id]
+            changed.append((old_entry[2][0], position, len(entries) + 1))
+        if new_entry is not None:
+            entries = self._filtered_data[new_entry[2][0]]
+            position = bisect.bisect_left(entries, new_entry)
+            entries.insert(position, new_entry)
+            self._entries[record_id] = new_entry
+            changed.append((new_entry[2][0], position, len(entries)))
+
+        # 列内で値がずれた範囲は dataChanged で、行数の増減は末尾の行の追加・削除として通知する
+        kept_rows = self._sync_row_count()
+        for line_char, first, length in changed:
+            col = ord(line_char) - ord('A')
+            last = min(length, kept_rows) - 1
+            if 0 <= col < len(self._headers) and first <= last:
+                self.dataChanged.emit(self.index(first, col), self.index(last, col))
+
+    def _sync_row_count(self):
+        """
+        各ラインの長さが変わった後に、行数の増減だけを末尾の行の追加・削除として通知する
+        :return: 変更前から残っている行数（これより後ろの行は追加・削除として通知済み）
+        """
+        old_row_count = self._row_count
+        new_row_count = max((len(v) for v in self._filtered_data.values()), default=0)
+        if new_row_count > old_row_count:
+            self.beginInsertRows(QModelIndex(), old_row_count, new_row_count - 1)
+            self._row_count = new_row_count
+            self.endInsertRows()
+        elif new_row_count < old_row_count:
+            self.beginRemoveRows(QModelIndex(), new_row_count, old_row_count - 1)
+            self._row_count = new_row_count
+            self.endRemoveRows()
+        return min(old_row_count, new_row_count)
+
+    def _notify_changes(self, old_filtered):
+        """行数の増減と、内容が変わった列の範囲だけをビューに通知する"""
+        new_filtered = self._filtered_data
+        kept_rows = self._sync_row_count()
+
+        for col in range(len(self._headers)):
+            line_char = chr(ord('A') + col)
+            old_list, new_list = old_filtered.get(line_char, []), new_filtered.get(line_char, [])
+            if old_list == new_list:
+                continue
+            # 最初に異なる位置から、その列で内容が残っている最後の行までを再描画する
+            first = next((i for i, (a, b) in enumerate(zip(old_list, new_list)) if a != b), min(len(old_list), len(new_list)))
+            last = min(max(len(old_list), len(new_list)), kept_rows) - 1
+            if first <= last:
+                self.dataChanged.emit(self.index(first, col), self.index(last, col))
 
     def rowCount(self, parent=QModelIndex()):
         if parent.isValid():
             return 0
-        # 各ラインの最大行数を取得
-        return max((len(v) for v in self._filtered_data.values()), default=0)
+        # 各ラインの最大行数（末尾の行の追加・削除を通知した時点で更新する）
+        return self._row_count
 
     def columnCount(self, parent=QModelIndex()):
         if parent.isValid():
@@ -460,8 +1021,9 @@ class UnprocessedMachineNumbersTableModel(QAbstractTableModel):
         line_char = chr(ord('A') + index.column())
         
         if role == Qt.DisplayRole:
-            if index.row() < len(self._filtered_data[line_char]):
-                return self._filtered_data[line_char][index.row()]
+            entries = self._filtered_data.get(line_char, [])
+            if index.row() < len(entries):
+                return entries[index.row()][2]
             return None
 
         if role == Qt.ForegroundRole:
@@ -0,0 +1,109 @@
+import datetime
+import os
+import sqlite3
+
+from local_snapshot import get_app_data_dir
+
+class OfflineJournal:
+    """
+    共有DBに書き込めない間の編集を記録するローカルの追記専用ジャーナル
+    再接続後に記録順に共有DBへ再適用し、適用できたものから削除する
+    編集前の値と行の updated_at も記録し、再適用時に他端末の変更と競合していないかを確認する
+    ジャーナルのファイルを作成できない場合は記録しない（オフライン中の編集は保存されない）
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            app_dir = get_app_data_dir()
+            path = os.path.join(app_dir, "offline_journal.db") if app_dir else None
+        self.path = path
+        self.conn = None
+        if self.path is not None:
+            self._open()
+
+    def _open(self):
+        try:
+            self.conn = sqlite3.connect(self.path)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS journal (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    record_id INTEGER NOT NULL,
+                    column_name TEXT NOT NULL,
+                    base_value,
+                    new_value,
+                    created_at TEXT NOT NULL,
+                    base_updated_at TEXT
+                )
+            """)
+            # 以前のバージョンで作成したジャーナルには updated_at の列が無い
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(journal)")}
+            if "base_updated_at" not in columns:
+                self.conn.execute("ALTER TABLE journal ADD COLUMN base_updated_at TEXT")
+            self.conn.commit()
+        except sqlite3.Error as e:
+            print(f"Failed to open offline journal: {e}")
+            if self.conn:
+                self.conn.close()
+            self.conn = None
+
+    def append(self, changes, versions=None):
+        """
+        編集を記録する
+        :param changes: (record_id, column, 新しい値, 編集前に画面に表示されていた値) のリスト
+        :param versions: record_id -> 編集前に画面に表示されていた行の updated_at
+        """
+        if self.conn is None:
+            print(f"Offline journal is unavailable; {len(changes)} edits were not recorded.")
+            return False
+        created_at = datetime.datetime.now().isoformat(sep=' ', timespec='seconds')
+        versions = versions or {}
+        try:
+            self.conn.executemany(
+                "INSERT INTO journal (record_id, column_name, new_value, base_value, created_at, base_updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(record_id, column, value, base_value, created_at, versions.get(record_id))
+                 for record_id, column, value, base_value in changes]
+            )
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Failed to write offline journal: {e}")
+            return False
+
+    def count(self):
+        if self.conn is None:
+            return 0
+        return self.conn.execute("SELECT COUNT(*) FROM journal").fetchone()[0]
+
+    def pending_changes(self):
+        """
+        再適用する編集を記録順に返す
+        同じセルへの複数の編集は、最初の編集前の値と updated_at、最後の値を持つ1件にまとめる
+        :return: (seqのリスト, record_id, column, 新しい値, 編集前の値, 編集前の updated_at) のリスト
+        """
+        if self.conn is None:
+            return []
+        merged = {}
+        rows = self.conn.execute(
+            "SELECT seq, record_id, column_name, new_value, base_value, base_updated_at FROM journal ORDER BY seq"
+        ).fetchall()
+        for seq, record_id, column, value, base_value, base_updated_at in rows:
+            key = (record_id, column)
+            if key in merged:
+                seqs, _, _, _, first_base, first_updated_at = merged.pop(key)
+                merged[key] = (seqs + [seq], record_id, column, value, first_base, first_updated_at)
+            else:
+                merged[key] = ([seq], record_id, column, value, base_value, base_updated_at)
+        return sorted(merged.values(), key=lambda change: change[0][-1])
+
+    def remove(self, seqs):
+        """再適用が完了した編集を削除する"""
+        if self.conn is None:
+            return
+        self.conn.executemany("DELETE FROM journal WHERE seq = ?", [(seq,) for seq in seqs])
+        self.conn.commit()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
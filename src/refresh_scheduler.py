@@ -0,0 +1,83 @@
+import collections
+import time
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+class RefreshRequest:
+    """
+    まとめて実行する画面更新の内容
+    reload_dates: 全件を読み直す日付
+    rows: 画面（'main', 'cleaning', 'unprocessed', 'search'）ごとに描画し直す行のidの集合
+    layout: テーブルの高さ・列幅を調整し直すかどうか
+    """
+    __slots__ = ("reload_dates", "rows", "layout")
+
+    def __init__(self):
+        self.reload_dates = set()
+        self.rows = collections.defaultdict(set)
+        self.layout = False
+
+    def __bool__(self):
+        return bool(self.reload_dates or self.rows or self.layout)
+
+class RefreshScheduler(QObject):
+    """
+    編集・元に戻す・他端末の変更などで発生する画面更新の要求（どの日付・どの行・どの画面か）を受け付け、
+    一定間隔の中で届いた要求を1回の最小限の更新にまとめて refresh_requested で通知する
+    """
+    refresh_requested = Signal(object)  # RefreshRequest
+
+    def __init__(self, interval_ms=50, parent=None):
+        super().__init__(parent)
+        self.interval_ms = interval_ms
+        self._request = RefreshRequest()
+        self._last_run = 0.0
+        self.requested_count = 0  # 受け付けた更新の要求数
+        self.executed_count = 0  # 実際に行った更新の回数
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+
+    def mark_dirty(self, date=None, rows=(), views=(), reload=False, layout=False):
+        """
+        画面更新の要求を追加する
+        :param date: reload=True の場合に読み直す日付
+        :param rows: 描画し直す行のid
+        :param views: rows を描画し直す画面の名前
+        :param reload: 日付の全件を読み直す場合True（同じ日付の行単位の更新は不要になる）
+        :param layout: テーブルの高さ・列幅を調整し直す場合True
+        """
+        self.requested_count += 1
+        if reload and date is not None:
+            self._request.reload_dates.add(date)
+        for view in views:
+            self._request.rows[view].update(rows)
+        self._request.layout = self._request.layout or layout
+        if not self._timer.isActive():
+            # 前回の更新から interval_ms 経つまでは実行しない（その間の要求はまとめる）
+            elapsed_ms = (time.monotonic() - self._last_run) * 1000
+            self._timer.start(max(0, int(self.interval_ms - elapsed_ms)))
+
+    def flush(self):
+        """まとめた更新を直ちに実行する"""
+        self._timer.stop()
+        request, self._request = self._request, RefreshRequest()
+        if not request:
+            return
+        self.executed_count += 1
+        self._last_run = time.monotonic()
+        self.refresh_requested.emit(request)
+
+    def cancel(self):
+        """まとめている更新を破棄する（日付の切り替えで全件を読み込む場合など）"""
+        self._timer.stop()
+        self._request = RefreshRequest()
+
+    def stats(self):
+        """要求数・実行回数・まとめて省略できた回数"""
+        return {
+            "requested": self.requested_count,
+            "executed": self.executed_count,
+            "saved": max(0, self.requested_count - self.executed_count),
+        }
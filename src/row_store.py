@@ -0,0 +1,102 @@
+import operator
+
+class RowSchema:
+    """
+    行データのカラム構成（同じクエリで取得した行はすべて1つのインスタンスを共有する）
+    """
+    __slots__ = ("columns", "positions", "_resolved")
+
+    def __init__(self, columns):
+        self.columns = tuple(columns)
+        self.positions = {column: i for i, column in enumerate(self.columns)}
+        self._resolved = {}
+
+    def resolve(self, headers):
+        """
+        表示するカラムの値をまとめて取り出す関数を返す（カラム名から位置への変換はカラム構成ごとに1回だけ行う）
+        存在しないカラムの値は空文字
+        """
+        headers = tuple(headers)
+        getter = self._resolved.get(headers)
+        if getter is None:
+            positions = [self.positions.get(header) for header in headers]
+            if None not in positions and len(positions) > 1:
+                getter = operator.itemgetter(*positions)
+            else:
+                getter = lambda values: tuple("" if position is None else values[position] for position in positions)
+            self._resolved[headers] = getter
+        return getter
+
+class PlanRow:
+    """
+    production_plan の1行分のデータ
+    値はカラム構成を共有した上でリストに保持するため、行ごとの辞書よりメモリ消費が少ない
+    既存のコードが使う dict と同じ操作（get, [], update, items など）に対応する
+    """
+    __slots__ = ("schema", "values")
+    __hash__ = None
+
+    def __init__(self, schema, values):
+        self.schema = schema
+        self.values = list(values)
+
+    def get(self, key, default=None):
+        position = self.schema.positions.get(key)
+        return default if position is None else self.values[position]
+
+    def __getitem__(self, key):
+        return self.values[self.schema.positions[key]]
+
+    def __setitem__(self, key, value):
+        position = self.schema.positions.get(key)
+        if position is None:
+            # 共有しているカラム構成に無いカラムは、この行専用のカラム構成を作って追加する（DB側のカラム追加時など）
+            self.schema = RowSchema(self.schema.columns + (key,))
+            self.values.append(value)
+        else:
+            self.values[position] = value
+
+    def __contains__(self, key):
+        return key in self.schema.positions
+
+    def __iter__(self):
+        return iter(self.schema.columns)
+
+    def __len__(self):
+        return len(self.values)
+
+    def keys(self):
+        return self.schema.columns
+
+    def items(self):
+        return zip(self.schema.columns, self.values)
+
+    def update(self, other):
+        for key, value in other.items():
+            self[key] = value
+
+    def to_dict(self):
+        return dict(zip(self.schema.columns, self.values))
+
+    def __eq__(self, other):
+        if isinstance(other, PlanRow):
+            if other.schema is self.schema:
+                return self.values == other.values
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"PlanRow({self.to_dict()!r})"
+
+def rows_from_cursor(cursor):
+    """実行済みのカーソルから PlanRow のリストを作成する"""
+    schema = RowSchema(description[0] for description in cursor.description)
+    return [PlanRow(schema, row) for row in cursor.fetchall()]
+
+def header_values(row, headers):
+    """表示するカラムの値を順に返す（存在しないカラムは空文字）"""
+    if isinstance(row, PlanRow):
+        return row.schema.resolve(headers)(row.values)
+    return [row.get(header, "") for header in headers]
@@ -0,0 +1,111 @@
+import sqlite3
+
+# このアプリが対応するスキーマのバージョン（共有DBの PRAGMA user_version と比較する。アプリからは書き込まない）
+SCHEMA_VERSION = 1
+
+# 画面表示・更新に必須のカラム
+REQUIRED_COLUMNS = (
+    "id", "acquisition_date", "machine_no", "manufacturing_check", "cleaning_check",
+    "cleaning_instruction", "notes",
+)
+
+# (インデックス名, カラム, 作成に必要なカラム)
+# 取得日での絞り込みはすべての読み込みで行うため、取得日を先頭にする
+# (acquisition_date, machine_no, cleaning_instruction) は洗浄指示の複製で使う列をすべて含み、テーブル本体を読まずに済む
+INDEXES = (
+    ("idx_production_plan_date_machine", ("acquisition_date", "machine_no", "cleaning_instruction"), ()),
+    ("idx_production_plan_date_updated", ("acquisition_date", "updated_at"), ("updated_at",)),
+    ("idx_production_plan_updated", ("updated_at",), ("updated_at",)),
+)
+
+# 診断用に実行計画を表示するクエリ (説明, クエリ, パラメータ)
+DIAGNOSTIC_QUERIES = (
+    ("日付指定の読み込み", "SELECT * FROM production_plan WHERE acquisition_date = ? ORDER BY id", ("2000-01-01",)),
+    ("変更行の確認", "SELECT id, updated_at FROM production_plan WHERE acquisition_date = ?", ("2000-01-01",)),
+    ("期間表示のページ読み込み",
+     "SELECT * FROM production_plan WHERE acquisition_date BETWEEN ? AND ? "
+     "AND (acquisition_date > ? OR (acquisition_date = ? AND id > ?)) ORDER BY acquisition_date, id LIMIT ?",
+     ("2000-01-01", "2000-01-31", "2000-01-01", "2000-01-01", 0, 200)),
+    ("複製元の機番",
+     "SELECT machine_no FROM production_plan "
+     "WHERE acquisition_date = ? AND cleaning_instruction IS NOT NULL AND cleaning_instruction != ''",
+     ("2000-01-01",)),
+    ("複製元の洗浄指示（機番ごと）",
+     "SELECT cleaning_instruction FROM production_plan WHERE acquisition_date = ? AND machine_no = ? "
+     "AND cleaning_instruction IS NOT NULL AND cleaning_instruction != '' ORDER BY id DESC LIMIT 1",
+     ("2000-01-01", "")),
+)
+
+class SchemaManager:
+    """
+    起動時に production_plan のスキーマを検査し、不足しているインデックスを作成する
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def get_columns(self):
+        return {row[1] for row in self.conn.execute("PRAGMA table_info(production_plan)").fetchall()}
+
+    def get_indexes(self):
+        return {row[1] for row in self.conn.execute("PRAGMA index_list(production_plan)").fetchall()}
+
+    def ensure(self):
+        """
+        スキーマの互換性を検査し、互換性があれば不足しているインデックスを作成する
+        :return: (互換性があるかどうか, 検査結果の辞書)
+        """
+        report = {"version": None, "missing_columns": [], "created_indexes": [], "error": None}
+        try:
+            version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+            report["version"] = version
+            columns = self.get_columns()
+        except sqlite3.Error as e:
+            report["error"] = f"スキーマの読み取りに失敗: {e}"
+            return False, report
+
+        if not columns:
+            report["error"] = "production_plan テーブルが見つかりません。"
+            return False, report
+        report["missing_columns"] = [column for column in REQUIRED_COLUMNS if column not in columns]
+        if report["missing_columns"]:
+            report["error"] = f"必須カラムがありません: {', '.join(report['missing_columns'])}"
+            return False, report
+        if version > SCHEMA_VERSION:
+            report["error"] = (f"DBのスキーマ (バージョン {version}) はこのアプリ (バージョン {SCHEMA_VERSION}) より新しいため、"
+                               "アプリを更新してください。")
+            return False, report
+
+        try:
+            existing = self.get_indexes()
+            for name, index_columns, needs in INDEXES:
+                if name in existing or any(column not in columns for column in needs):
+                    continue
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON production_plan ({', '.join(index_columns)})")
+                report["created_indexes"].append(name)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            # 読み取り専用の共有フォルダなどでは作成できないが、読み込み自体は可能なので互換性ありとして続行する
+            self.conn.rollback()
+            report["created_indexes"] = []
+            report["error"] = f"インデックスを作成できませんでした: {e}"
+        if report["created_indexes"]:
+            print(f"Created indexes: {', '.join(report['created_indexes'])}")
+        return True, report
+
+    def explain_queries(self):
+        """
+        アプリが使う主なクエリの実行計画を取得する
+        :return: (説明, クエリ, 実行計画の各行) のリスト
+        """
+        columns = self.get_columns()
+        plans = []
+        for label, query, params in DIAGNOSTIC_QUERIES:
+            if "updated_at" in query and "updated_at" not in columns:
+                continue
+            try:
+                rows = self.conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+                plans.append((label, query, [row[-1] for row in rows]))
+            except sqlite3.Error as e:
+                plans.append((label, query, [f"取得失敗: {e}"]))
+        return plans
@@ -0,0 +1,93 @@
+import collections
+import unicodedata
+
+# 文字検索の対象カラム（要件定義書 5.1 フィルタパネル）
+SEARCH_COLUMNS = ("part_number", "product_name", "customer_name")
+
+def normalize_text(text):
+    """
+    検索用に文字列を正規化する
+    全角/半角（英数字・カタカナ）の違いと大文字/小文字の違いを吸収する
+    """
+    if text is None:
+        return ""
+    return unicodedata.normalize("NFKC", str(text)).casefold()
+
+class SearchIndex:
+    """
+    品番・品名・客先名の部分一致検索用のN-gram索引
+    正規化は索引の作成時に1回だけ行い、検索時は検索語の各N-gramを含む行の集合を絞り込んでから部分一致を確認する
+    """
+
+    def __init__(self, columns=SEARCH_COLUMNS):
+        self.columns = columns
+        self._texts = {}  # record_id -> 正規化済みの検索対象文字列
+        self._unigrams = collections.defaultdict(set)  # 1文字 -> record_idの集合
+        self._bigrams = collections.defaultdict(set)  # 2文字 -> record_idの集合
+
+    def __len__(self):
+        return len(self._texts)
+
+    def build(self, rows):
+        """読み込んだ行から索引を作り直す"""
+        self._texts.clear()
+        self._unigrams.clear()
+        self._bigrams.clear()
+        for row in rows:
+            self._add(row)
+
+    def update_row(self, row):
+        """1行分の索引を更新する（他端末の変更の反映時など）"""
+        self._remove(row.get("id"))
+        self._add(row)
+
+    def search(self, query):
+        """
+        検索語を含む行のidの集合を返す
+        空白で区切った複数の語はすべてを含む行（AND検索）
+        :return: record_idの集合。検索語が空の場合はNone（絞り込みなし）
+        """
+        terms = normalize_text(query).split()
+        if not terms:
+            return None
+        matches = None
+        # 候補が少なくなる長い語から絞り込む
+        for term in sorted(terms, key=len, reverse=True):
+            candidates = self._candidates(term)
+            if matches is not None:
+                candidates = candidates & matches
+            # N-gramがすべて含まれていても連続しているとは限らないため、候補の行だけ部分一致を確認する
+            matches = {record_id for record_id in candidates if term in self._texts[record_id]}
+            if not matches:
+                break
+        return matches
+
+    def _candidates(self, term):
+        if len(term) == 1:
+            return self._unigrams.get(term, set())
+        postings = [self._bigrams.get(term[i:i + 2]) for i in range(len(term) - 1)]
+        if any(posting is None for posting in postings):
+            return set()
+        postings.sort(key=len)
+        return postings[0].intersection(*postings[1:])
+
+    def _add(self, row):
+        record_id = row.get("id")
+        if record_id is None:
+            return
+        # カラムの境界をまたいで一致しないよう、区切り文字を挟んで連結する
+        text = "\n".join(normalize_text(row.get(column)) for column in self.columns)
+        self._texts[record_id] = text
+        for char in set(text):
+            self._unigrams[char].add(record_id)
+        for gram in {text[i:i + 2] for i in range(len(text) - 1)}:
+            self._bigrams[gram].add(record_id)
+
+    def _remove(self, record_id):
+        text = self._texts.pop(record_id, None)
+        if text is None:
+            return
+        for char in set(text):
+            self._unigrams[char].discard(record_id)
+        for gram in {text[i:i + 2] for i in range(len(text) - 1)}:
+            self._bigrams[gram].discard(record_id)
@@ -0,0 +1,65 @@
+import collections
+
+class DateSnapshotCache:
+    """
+    取得日ごとのデータをメモリ上に保持するLRUキャッシュ
+    各エントリは読み込み時の変更トークンと行のリストを持ち、合計行数が上限を超えると古い日付から破棄する
+    行のリストは表示中のモデルと共有するため、自端末の編集はそのままキャッシュにも反映される
+    """
+
+    def __init__(self, max_dates=14, max_rows=5000):
+        self.max_dates = max_dates
+        self.max_rows = max_rows
+        self._entries = collections.OrderedDict()  # acquisition_date -> (token, rows)
+        self._row_count = 0
+
+    def __contains__(self, acquisition_date):
+        return acquisition_date in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, acquisition_date):
+        """
+        キャッシュされたデータを取得する（最近使ったものとして扱う）
+        :return: (変更トークン, 行のリスト) のタプル。無い場合はNone
+        """
+        entry = self._entries.get(acquisition_date)
+        if entry is not None:
+            self._entries.move_to_end(acquisition_date)
+        return entry
+
+    def put(self, acquisition_date, token, rows):
+        """データを登録し、上限を超えた分を古いものから破棄する"""
+        self.invalidate(acquisition_date)
+        self._entries[acquisition_date] = (token, rows)
+        self._row_count += len(rows)
+        self._evict(keep=acquisition_date)
+
+    def recent(self, count):
+        """最近使った順に (取得日, 行のリスト) を返す"""
+        dates = list(reversed(self._entries))[:count]
+        return [(date, self._entries[date][1]) for date in dates]
+
+    def update_token(self, acquisition_date, token):
+        """差分の反映によって最新になったデータのトークンを更新する"""
+        entry = self._entries.get(acquisition_date)
+        if entry is not None:
+            self._entries[acquisition_date] = (token, entry[1])
+
+    def invalidate(self, acquisition_date=None):
+        """指定日（省略時はすべて）のキャッシュを破棄する"""
+        if acquisition_date is None:
+            self._entries.clear()
+            self._row_count = 0
+            return
+        entry = self._entries.pop(acquisition_date, None)
+        if entry is not None:
+            self._row_count -= len(entry[1])
+
+    def _evict(self, keep):
+        while len(self._entries) > 1 and (len(self._entries) > self.max_dates or self._row_count > self.max_rows):
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                break
+            self.invalidate(oldest)
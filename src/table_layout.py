@@ -0,0 +1,73 @@
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QHeaderView
+
+class TableLayoutManager:
+    """
+    テーブルの高さ・列幅を安価に調整する
+    行の高さは全行で同じにして、テーブルの高さは行数の掛け算で求める（行ごとの rowHeight を合計しない）
+    列幅は標本の行の文字列のうち長いものだけを測り、測った幅は文字列ごとにキャッシュする
+    高さ・列幅が変わらない場合はビューに設定し直さない（再レイアウトを起こさない）
+    """
+
+    def __init__(self, sample_rows=200, candidates=5, padding=12):
+        self.sample_rows = sample_rows  # 列幅の計算に使う最大の行数（それ以上は等間隔に間引く）
+        self.candidates = candidates  # 各列で実際に測る文字列の数（文字数の多い順）
+        self.padding = padding  # 文字列の幅に加えるセルの余白
+        self._text_widths = {}  # (フォント, 文字列) -> 幅
+        self.measured_count = 0  # 実際に文字列の幅を測った回数
+
+    def set_uniform_rows(self, view):
+        """全行を同じ高さにする（行の高さを内容から測らない）"""
+        view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+
+    def fit_height(self, view):
+        """
+        全行が表示される高さにテーブルを固定する（行数が変わった場合のみ設定し直す）
+        """
+        row_count = view.model().rowCount() if view.model() else 0
+        header_height = view.horizontalHeader().height()
+        rows_height = row_count * view.verticalHeader().defaultSectionSize()
+        grid_lines_height = max(row_count - 1, 0)
+        total_height = header_height + rows_height + grid_lines_height + 2
+        if view.minimumHeight() != total_height or view.maximumHeight() != total_height:
+            view.setFixedHeight(total_height)
+
+    def fit_columns(self, view, minimum_widths=None):
+        """
+        列幅を内容に合わせる（固定幅・伸縮の列は対象外）
+        :param minimum_widths: 列番号 -> 最小幅
+        """
+        model = view.model()
+        if model is None:
+            return
+        header = view.horizontalHeader()
+        minimum_widths = minimum_widths or {}
+        rows = self._sample_rows(model.rowCount())
+        font_key = view.font().key()
+        metrics = view.fontMetrics()
+        for column in range(model.columnCount()):
+            if header.isSectionHidden(column) or header.sectionResizeMode(column) in (QHeaderView.Fixed, QHeaderView.Stretch):
+                continue
+            texts = {model.index(row, column).data(Qt.DisplayRole) for row in rows}
+            longest = sorted((str(text) for text in texts if text not in (None, "")), key=len, reverse=True)[:self.candidates]
+            width = max([self._text_width(metrics, font_key, text) + self.padding for text in longest]
+                        + [header.sectionSizeHint(column), minimum_widths.get(column, 0)])
+            if header.sectionSize(column) != width:
+                header.resizeSection(column, width)
+
+    def _sample_rows(self, row_count):
+        if row_count <= self.sample_rows:
+            return range(row_count)
+        step = row_count / self.sample_rows
+        return [int(i * step) for i in range(self.sample_rows)]
+
+    def _text_width(self, metrics, font_key, text):
+        key = (font_key, text)
+        width = self._text_widths.get(key)
+        if width is None:
+            if len(self._text_widths) >= 10000:
+                self._text_widths.clear()
+            width = metrics.horizontalAdvance(text)
+            self._text_widths[key] = width
+            self.measured_count += 1
+        return width
@@ -0,0 +1,60 @@
+import collections
+
+class UndoOperation:
+    """
+    元に戻す・やり直しの1操作（貼り付けや洗浄指示の複製など、複数のセルの変更も1操作として扱う）
+    changes: (record_id, カラム名, 変更前の値, 変更後の値) のリスト
+    dates: 変更した行の取得日の集合（不明な場合は空）
+    versions: 表示していない行の、最後に書き込んだ updated_at（元に戻す際の楽観的排他制御の基準）
+    """
+    __slots__ = ("label", "changes", "dates", "versions")
+
+    def __init__(self, label, changes, dates=(), versions=None):
+        self.label = label
+        self.changes = list(changes)
+        self.dates = set(dates)
+        self.versions = dict(versions or {})
+
+    def undo_changes(self):
+        """元に戻すために書き込む (record_id, カラム名, 値, 書き込む前にあるはずの値) のリスト"""
+        return [(record_id, column, old_value, new_value) for record_id, column, old_value, new_value in self.changes]
+
+    def redo_changes(self):
+        """やり直すために書き込む (record_id, カラム名, 値, 書き込む前にあるはずの値) のリスト"""
+        return [(record_id, column, new_value, old_value) for record_id, column, old_value, new_value in self.changes]
+
+class UndoHistory:
+    """
+    上限付きの元に戻す・やり直しの履歴
+    上限を超えた古い操作は deque から自動的に捨てられる
+    """
+
+    def __init__(self, max_size=50):
+        self._undo = collections.deque(maxlen=max_size)
+        self._redo = collections.deque(maxlen=max_size)
+
+    def push(self, operation):
+        """新しい操作を追加する（やり直しの履歴は破棄される）"""
+        self._undo.append(operation)
+        self._redo.clear()
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def undo(self):
+        """元に戻す操作を取り出し、やり直しの履歴に移す"""
+        operation = self._undo.pop()
+        self._redo.append(operation)
+        return operation
+
+    def redo(self):
+        """やり直す操作を取り出し、元に戻す履歴に移す"""
+        operation = self._redo.pop()
+        self._undo.append(operation)
+        return operation
+
+    def __len__(self):
+        return len(self._undo)
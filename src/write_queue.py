@@ -0,0 +1,165 @@
+import collections
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+class WriteBehindQueue(QObject):
+    """
+    セル編集をしばらく溜めてから1トランザクションでDBへ書き込むキュー
+    同じ (record_id, column) への連続した編集は最後の値にまとめる
+    書き込みは楽観的排他制御付きで行い、他端末で更新されていた行は書き込まずに flush_finished の conflicts で返す
+    同じ行への書き込みは前の書き込みが完了してから送る（基準の updated_at を前の書き込みの結果から取り直すため、
+    自端末の書き込み同士が競合として扱われない）
+    """
+    pending_count_changed = Signal(int)
+    flush_finished = Signal(object, object)  # update_records_checked の結果の辞書, (record_id, column, 値, 編集前の値) のリスト
+    flush_failed = Signal(object, object)  # (record_id, column, 値, 編集前の値) のリスト, エラーメッセージ
+
+    def __init__(self, db_worker, window_ms=300, version_of=None, parent=None):
+        super().__init__(parent)
+        self.db_worker = db_worker
+        self._version_of = version_of  # record_id -> 画面に表示している行の updated_at
+        self._pending = collections.OrderedDict()  # (record_id, column) -> (value, 編集前の値)
+        self._in_flight = 0  # キューから送り出して完了待ちの件数
+        self._writing = 0  # write() で受け付けて完了待ちの件数
+        self._held = collections.deque()  # 同じ行の書き込みの完了待ちの (changes, versions, callback)
+        self._busy = collections.Counter()  # record_id -> DBワーカーで実行中の書き込みの数
+        self._sent = {}  # DBワーカーの要求ID -> 結果を受け取っていない書き込みの changes
+        self._waiters = []
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(window_ms)
+        self._timer.timeout.connect(self.flush)
+
+    def enqueue(self, record_id, column, value, base_value=None):
+        """
+        編集をキューに追加する（最初の編集から一定時間後にまとめて書き込む）
+        :param base_value: 編集前に画面に表示されていた値（書き込み失敗時にジャーナルへ記録する）
+        """
+        key = (record_id, column)
+        # 再編集された場合は末尾に移動して最新の値で上書き（編集前の値は最初のものを残す）
+        previous = self._pending.pop(key, None)
+        if previous is not None:
+            base_value = previous[1]
+        self._pending[key] = (value, base_value)
+        if not self._timer.isActive():
+            self._timer.start()
+        self.pending_count_changed.emit(self.pending_count())
+
+    def pending_count(self):
+        """未反映の編集件数（書き込み中のもの、write() で受け付けたものを含む）"""
+        return len(self._pending) + self._in_flight + self._writing
+
+    def flush(self, on_finished=None):
+        """
+        溜まっている編集を即座に書き込む
+        :param on_finished: 書き込み中のものも含めてすべて反映された後に呼ばれる関数
+        """
+        self._timer.stop()
+        if on_finished is not None:
+            self._waiters.append(on_finished)
+
+        if self._pending:
+            changes = [(record_id, column, value, base_value)
+                       for (record_id, column), (value, base_value) in self._pending.items()]
+            self._pending.clear()
+            self._in_flight += len(changes)
+            self._held.append((changes, None, lambda result, error: self._on_flushed(changes, result, error)))
+            self._submit_ready()
+        elif self._is_idle():
+            self._notify_waiters()
+
+    def write(self, changes, callback, versions=None):
+        """
+        キューを経由しない編集（貼り付け・元に戻すなど）を楽観的排他制御付きで書き込む
+        :param changes: (record_id, column, value, 編集前の値) のリスト
+        :param callback: 完了時に呼ばれる関数 callback(result, error)
+        :param versions: 表示していない行の updated_at
+        """
+        # 完了するまでは未反映として数え、その間の変更の確認で自端末の書き込みを他端末の変更と誤認しないようにする
+        self._writing += len(changes)
+
+        def on_finished(result, error):
+            self._writing -= len(changes)
+            callback(result, error)
+            self.pending_count_changed.emit(self.pending_count())
+
+        self._held.append((changes, versions or {}, on_finished))
+        self.pending_count_changed.emit(self.pending_count())
+        self._submit_ready()
+
+    def take_unconfirmed(self):
+        """
+        書き込めたことを確認できていない編集（未送信のもの、結果を受け取っていないもの）を取り出す
+        終了時にジャーナルへ記録し、次回の起動時に再適用するために使う
+        :return: (record_id, column, value, 編集前の値) のリスト
+        """
+        self._timer.stop()
+        changes = [change for sent_changes in self._sent.values() for change in sent_changes]
+        self._sent.clear()
+        changes += [(record_id, column, value, base_value)
+                    for (record_id, column), (value, base_value) in self._pending.items()]
+        self._pending.clear()
+        for held_changes, _, _ in self._held:
+            changes.extend(held_changes)
+        self._held.clear()
+        self._in_flight = self._writing = 0
+        self.pending_count_changed.emit(self.pending_count())
+        return changes
+
+    def _submit_ready(self):
+        """同じ行の書き込みが実行中でない要求を順に送る（先に積まれた要求と同じ行を含む要求は追い越さない）"""
+        waiting_ids = set()
+        held = collections.deque()
+        while self._held:
+            changes, versions, callback = self._held.popleft()
+            record_ids = {record_id for record_id, *_ in changes}
+            if waiting_ids & record_ids or any(self._busy[record_id] for record_id in record_ids):
+                waiting_ids |= record_ids
+                held.append((changes, versions, callback))
+                continue
+            self._submit(changes, versions, callback)
+        self._held = held
+
+    def _submit(self, changes, versions, callback):
+        # 基準の updated_at は送る直前に取得する（同じ行の前の書き込みの結果が反映済み）
+        version_of = self._version_of or (lambda record_id: None)
+        checked = []
+        for record_id, column, value, _ in changes:
+            version = version_of(record_id)
+            if version is None and versions:
+                version = versions.get(record_id)
+            checked.append((record_id, column, value, version))
+        record_ids = {record_id for record_id, *_ in changes}
+        self._busy.update(record_ids)
+
+        def on_finished(result, error):
+            if self._sent.pop(request_id, None) is None:
+                return  # 終了時に take_unconfirmed で取り出し済み
+            self._busy.subtract(record_ids)
+            self._busy += collections.Counter()  # 0件になった行を取り除く
+            callback(result, error)
+            self._submit_ready()
+            if self._is_idle():
+                self._notify_waiters()
+
+        # コールバックはGUIスレッドで後から呼ばれるため、request_id は呼ばれる時点で設定済み
+        request_id = self.db_worker.submit('write', 'update_records_checked', checked, callback=on_finished)
+        self._sent[request_id] = changes
+
+    def _on_flushed(self, changes, result, error):
+        self._in_flight -= len(changes)
+        success, result = result if result is not None else (False, error)
+        if success:
+            self.flush_finished.emit(result, changes)
+        else:
+            self.flush_failed.emit(changes, result)
+        self.pending_count_changed.emit(self.pending_count())
+
+    def _is_idle(self):
+        return not self._pending and not self._held and not self._busy
+
+    def _notify_waiters(self):
+        waiters, self._waiters = self._waiters, []
+        for callback in waiters:
+            callback()